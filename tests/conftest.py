@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,17 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def nplusone_raise(settings):
+    # Как и в manage.py test: N+1 в любом view роняет тест.
+    settings.NPLUSONE_MODE = 'raise'
+
+
+@pytest.fixture(autouse=True)
+def thumbnails_inline(monkeypatch):
+    # Фоновый воркер мог дописывать миниатюры во временный MEDIA_ROOT,
+    # когда фикстура уже его удаляет.
+    from posts import thumbnails
+    monkeypatch.setattr(thumbnails, 'schedule', thumbnails.warm)
@@ -0,0 +1,83 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(title='Группа', slug='api',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_json(self, url, **params):
+        response = self.client.get(url, params)
+        return response.status_code, json.loads(response.content)
+
+    def test_posts_are_paginated_by_cursor(self):
+        url = reverse('api:posts')
+        with self.assertNumQueries(1):
+            status, first = self.get_json(url, limit=3)
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual([post['text'] for post in first['results']],
+                         ['Пост 4', 'Пост 3', 'Пост 2'])
+        self.assertEqual(first['results'][0]['author'], 'api_author')
+        _, second = self.get_json(url, limit=3, cursor=first['next_cursor'])
+        self.assertEqual([post['id'] for post in second['results']],
+                         [self.posts[1].pk, self.posts[0].pk])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_group_profile_and_detail(self):
+        _, data = self.get_json(reverse('api:group', args=['api']))
+        self.assertEqual(data['group']['posts_count'], 2)
+        self.assertEqual(len(data['results']), 2)
+        _, data = self.get_json(reverse('api:profile', args=['api_author']))
+        self.assertEqual(data['profile']['posts_count'], 5)
+        _, data = self.get_json(
+            reverse('api:post_detail', args=[self.posts[0].pk]))
+        self.assertEqual(data['comments_count'], 1)
+        _, data = self.get_json(
+            reverse('api:comments', args=[self.posts[0].pk]))
+        self.assertEqual(data['results'][0]['author'], 'api_reader')
+        for url in (reverse('api:group', args=['missing']),
+                    reverse('api:profile', args=['missing']),
+                    reverse('api:post_detail', args=[0])):
+            with self.subTest(url=url):
+                self.assertEqual(self.get_json(url)[0], HTTPStatus.NOT_FOUND)
+
+    def test_follow_feed_requires_login(self):
+        url = reverse('api:follow')
+        self.assertEqual(self.get_json(url)[0], HTTPStatus.UNAUTHORIZED)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        _, data = self.get_json(url, limit=2)
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[4].pk, self.posts[3].pk])
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_export_is_streamed(self):
+        response = self.client.get(reverse('api:export_posts'),
+                                   {'group': 'api'})
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([post['id'] for post in data],
+                         [self.posts[3].pk, self.posts[1].pk])
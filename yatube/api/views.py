@@ -0,0 +1,168 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+from core.cache import cache_page_versioned
+from core.lookups import get_cached
+from core.paginator import CursorPaginator
+from posts.models import Comment, FeedEntry, Group, Post, UserStats
+from posts.views import PAGE_CACHE_TIMEOUT, follow_scope, post_author_scope
+
+User = get_user_model()
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 2000
+
+POST_VALUES = ('id', 'text', 'pub_date', 'updated', 'image',
+               'comments_count', 'author__username', 'group__slug')
+COMMENT_VALUES = ('id', 'text', 'pub_date', 'author__username')
+POST_ORDERING = ('-pub_date', '-id')
+
+
+def post_json(row):
+    """Словарь из ``.values()`` в формат API, без создания моделей."""
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'updated': row['updated'],
+        'image': settings.MEDIA_URL + row['image'] if row['image'] else None,
+        'comments_count': row['comments_count'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+    }
+
+
+def comment_json(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+    }
+
+
+def not_found():
+    return JsonResponse({'detail': 'Не найдено.'}, status=404)
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        size = PAGE_SIZE
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def paginated(request, rows, serialize, ordering=POST_ORDERING, **extra):
+    """Страница по ключу сортировки: results и курсоры соседних страниц."""
+    paginator = CursorPaginator(rows, page_size(request), ordering=ordering)
+    page_obj = paginator.get_cursor_page(cursor=request.GET.get('cursor'))
+    return JsonResponse(dict(
+        extra,
+        results=[serialize(row) for row in page_obj.object_list],
+        next_cursor=page_obj.next_cursor,
+        previous_cursor=page_obj.previous_cursor,
+    ))
+
+
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'posts')
+def posts(request):
+    return paginated(request, Post.objects.values(*POST_VALUES), post_json)
+
+
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'group:{slug}')
+def group(request, slug):
+    found = get_cached(Group, slug=slug)
+    if found is None:
+        return not_found()
+    rows = Post.objects.filter(group_id=found.pk).values(*POST_VALUES)
+    return paginated(request, rows, post_json, group={
+        'slug': found.slug,
+        'title': found.title,
+        'description': found.description,
+        'posts_count': found.posts_count,
+    })
+
+
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'author:{username}')
+def profile(request, username):
+    author = get_cached(User, username=username)
+    if author is None:
+        return not_found()
+    stats = (UserStats.objects.filter(user_id=author.pk)
+             .values('posts_count', 'followers_count', 'following_count')
+             .first())
+    rows = Post.objects.filter(author_id=author.pk).values(*POST_VALUES)
+    return paginated(request, rows, post_json, profile=dict(
+        stats or {},
+        username=author.username,
+        full_name=author.get_full_name(),
+    ))
+
+
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'post:{post_id}',
+                      post_author_scope)
+def post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values(*POST_VALUES).first()
+    if row is None:
+        return not_found()
+    return JsonResponse(post_json(row))
+
+
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'post:{post_id}')
+def comments(request, post_id):
+    rows = Comment.objects.filter(post_id=post_id).values(*COMMENT_VALUES)
+    return paginated(request, rows, comment_json, ordering=('pub_date', 'id'))
+
+
+def follow(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Нужна авторизация.'}, status=401)
+    return cached_follow(request)
+
+
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', follow_scope)
+def cached_follow(request):
+    entries = (FeedEntry.objects
+               .filter(user=request.user)
+               .values('id', 'pub_date', 'post_id'))
+    paginator = CursorPaginator(entries, page_size(request),
+                                ordering=POST_ORDERING)
+    page_obj = paginator.get_cursor_page(cursor=request.GET.get('cursor'))
+    ids = [entry['post_id'] for entry in page_obj.object_list]
+    rows = {row['id']: row for row in
+            Post.objects.filter(pk__in=ids).values(*POST_VALUES)}
+    return JsonResponse({
+        'results': [post_json(rows[pk]) for pk in ids if pk in rows],
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
+def export_posts(request):
+    """Все посты (с фильтрами group и author) одним потоковым JSON-массивом.
+
+    Строки читаются из базы порциями через ``iterator()``, поэтому память
+    не растёт с размером выгрузки.
+    """
+    rows = Post.objects.order_by(*POST_ORDERING)
+    if request.GET.get('group'):
+        rows = rows.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        rows = rows.filter(author__username=request.GET['author'])
+    rows = rows.values(*POST_VALUES).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def stream():
+        yield '['
+        for number, row in enumerate(rows):
+            yield (',' if number else '') + json.dumps(
+                post_json(row), cls=DjangoJSONEncoder, ensure_ascii=False)
+        yield ']'
+
+    return StreamingHttpResponse(stream(),
+                                 content_type='application/json')
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import ProfileCapture
+
+
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = ('pub_date', 'view_name', 'path', 'duration',
+                    'query_count', 'file_name')
+    list_filter = ('view_name',)
+    search_fields = ('path',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(ProfileCapture, ProfileCaptureAdmin)
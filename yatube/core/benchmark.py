@@ -0,0 +1,159 @@
+import importlib
+import json
+import math
+import time
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import seeding
+from posts.models import Group, Post
+from posts.syndication import follow_token
+
+User = get_user_model()
+
+URL_MODULES = ('posts.urls', 'users.urls', 'about.urls')
+BENCHMARK_SCALE = seeding.Scale(users=60, groups=6, posts=800,
+                                comments=1500, follows=10, images=0)
+# Запас при записи бюджетов: время плавает от машины к машине.
+LATENCY_HEADROOM = 3
+LATENCY_FLOOR_MS = 50
+SIZE_HEADROOM = 1.2
+SKIPPED = {
+    'posts:profile_follow',
+    'posts:profile_unfollow',
+    'posts:add_comment',
+    'users:logout',
+}
+# Параметры строки запроса: без них поиск меряет только пустую выдачу.
+QUERIES = {
+    'posts:search': ('q',),
+    'posts:search_api': ('q',),
+}
+
+
+def seed(number=1, scale=None):
+    """Небольшой воспроизводимый набор данных для замеров.
+
+    Читатель — автор самого обсуждаемого поста, так что страница поста
+    показывает комментарии, а правка открывается автору. Возвращает
+    читателя и значения параметров маршрутов.
+    """
+    base = seeding.seed(scale or BENCHMARK_SCALE, seed=number, workers=0)
+    post = Post.objects.order_by('-comments_count', 'pk').first()
+    reader = post.author
+    popular = base.user if reader.pk != base.user else base.user + 1
+    word = max(post.text.split(), key=len).strip('.,!?')
+    return reader, {
+        'username': User.objects.get(pk=popular).username,
+        'slug': Group.objects.get(pk=base.group).slug,
+        'post_id': post.pk,
+        'token': follow_token(reader),
+        'q': word,
+    }
+
+
+def routes(values):
+    """Именованные маршруты из ``URL_MODULES`` с готовыми адресами.
+
+    Маршруты из ``SKIPPED`` не замеряются: GET к ним меняет состояние
+    или только перенаправляет.
+    """
+    for module_name in URL_MODULES:
+        module = importlib.import_module(module_name)
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            if name in SKIPPED:
+                continue
+            kwargs = {key: values[key]
+                      for key in pattern.pattern.converters}
+            url = reverse(name, kwargs=kwargs)
+            if name in QUERIES:
+                url += '?' + urlencode({
+                    key: values[key] for key in QUERIES[name]})
+            yield name, url
+
+
+def percentile(samples, share):
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+def measure(user, url, repeat):
+    """Запросы, p50/p95 (мс) и размер ответа на холодном кэше.
+
+    Первый запрос прогревает шаблоны и не учитывается; кэш очищается
+    перед каждым замером, чтобы мерить рендер, а не чтение из кэша.
+    """
+    client = Client()
+    timings = []
+    for attempt in range(repeat + 1):
+        cache.clear()
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        if attempt:
+            timings.append(elapsed * 1000)
+    return {
+        'url': url,
+        'status': response.status_code,
+        'queries': len(queries),
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'bytes': len(response.content),
+    }
+
+
+def compare(results, budgets):
+    """Список нарушений бюджетов.
+
+    Нарушение — и маршрут без бюджета, и ответ с другим статусом: ошибка
+    обычно и меньше, и быстрее нормальной страницы.
+    """
+    failures = []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f'{name}: нет бюджета')
+            continue
+        if result['status'] != budget['status']:
+            failures.append(f'{name}: статус {result["status"]} '
+                            f'вместо {budget["status"]}')
+        for field in ('queries', 'p95_ms', 'bytes'):
+            if result[field] > budget[field]:
+                failures.append(f'{name}: {field} {result[field]} '
+                                f'> {budget[field]}')
+    return failures
+
+
+def budgets_for(results):
+    """Бюджеты по текущим замерам: запросы точно, время и размер с запасом."""
+    return {
+        name: {
+            'status': result['status'],
+            'queries': result['queries'],
+            'p95_ms': max(math.ceil(result['p95_ms'] * LATENCY_HEADROOM),
+                          LATENCY_FLOOR_MS),
+            'bytes': math.ceil(result['bytes'] * SIZE_HEADROOM),
+        }
+        for name, result in sorted(results.items())
+    }
+
+
+def load(path):
+    with open(path, encoding='utf-8') as budgets_file:
+        return json.load(budgets_file)
+
+
+def dump(data, path):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(data, output, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        output.write('\n')
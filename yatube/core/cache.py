@@ -0,0 +1,235 @@
+import hashlib
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (
+    get_cache_key, has_vary_header, learn_cache_key, patch_cache_control
+)
+from django.views.decorators.http import condition
+
+from . import holes
+
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+LOCK_POLL = 0.05
+
+
+def _generation_key(scope):
+    return f'generation:{scope}'
+
+
+def _new_generation():
+    """Уникальный токен поколения; начинается с времени в миллисекундах."""
+    return '%x.%s' % (int(time.time() * 1000), uuid.uuid4().hex[:16])
+
+
+def changed_at(tokens):
+    """Время последнего сдвига среди поколений или None."""
+    stamps = []
+    for token in tokens:
+        try:
+            stamps.append(int(token.split('.', 1)[0], 16) / 1000)
+        except ValueError:
+            return None
+    if not stamps:
+        return None
+    return datetime.fromtimestamp(max(stamps), tz=timezone.utc)
+
+
+def generations(scopes):
+    """Текущие поколения областей; отсутствующие заводятся заново."""
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        cache.add(key, _new_generation(), None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return [found.get(key, '') for key in keys]
+
+
+def bump(*scopes):
+    """Сдвигает поколения: всё, что закэшировано под ними, устаревает."""
+    cache.set_many(
+        {_generation_key(scope): _new_generation() for scope in scopes},
+        None
+    )
+
+
+def resolve_scopes(scopes, request, *args, **kwargs):
+    """Подставляет аргументы view в шаблоны областей."""
+    names = []
+    for scope in scopes:
+        if callable(scope):
+            scope = scope(request, *args, **kwargs)
+        if isinstance(scope, str):
+            names.append(scope.format(**kwargs))
+        else:
+            names.extend(scope)
+    return names
+
+
+def signature(scopes):
+    return hashlib.md5(':'.join(generations(scopes)).encode()).hexdigest()
+
+
+def _cacheable(request, response):
+    """Оболочку можно отдавать всем: без CSRF-токена и личных cookie.
+
+    Страница с ``{% csrf_token %}`` вне дыр не кэшируется: cookie и
+    ``Vary: Cookie`` ставит CsrfViewMiddleware уже после этой проверки,
+    и следующие посетители получили бы форму без своего cookie.
+    """
+    return (response.status_code == 200 and not response.streaming
+            and not request.META.get('CSRF_COOKIE_USED')
+            and not (not request.COOKIES and response.cookies
+                     and has_vary_header(response, 'Cookie')))
+
+
+def lock_key(request, key_prefix):
+    """Ключ блокировки пересчёта страницы.
+
+    Строится из адреса запроса, а не из ключа ответа: тот известен
+    только после первого рендера и пропадает вместе со списком
+    заголовков, то есть как раз на холодном кэше.
+    """
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'lock:{key_prefix}:{url}'
+
+
+def cached_response(request, render, key_prefix, version, timeout,
+                    grace=None):
+    """Ответ из кэша страниц с защитой от одновременного пересчёта.
+
+    Запись хранится под стабильным ключом вместе с подписью поколений
+    ``version`` и сроком свежести. Устаревшую запись пересчитывает
+    только тот, кто взял блокировку; остальные ещё ``grace`` секунд
+    получают старую копию. Если копии нет совсем, они недолго ждут,
+    пока её положит первый.
+
+    Кэшируется оболочка страницы, общая для всех посетителей:
+    персональные фрагменты (``{% hole %}``) заполняются на каждом
+    запросе.
+    """
+    if grace is None:
+        grace = getattr(settings, 'PAGE_CACHE_GRACE', 60)
+    key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+    entry = cache.get(key) if key else None
+    if entry is not None:
+        entry_version, fresh_until, response = entry
+        if entry_version == version and fresh_until > time.time():
+            return holes.fill(request, response)
+    lock = lock_key(request, key_prefix)
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            response = _render_shell(request, render)
+            if _cacheable(request, response):
+                key = learn_cache_key(request, response, timeout + grace,
+                                      key_prefix, cache=cache)
+                cache.set(key, (version, time.time() + timeout, response),
+                          timeout + grace)
+            return holes.fill(request, response)
+        finally:
+            cache.delete(lock)
+    if entry is None:
+        entry = _wait_for_entry(request, key_prefix, version, lock)
+    if entry is not None:
+        return holes.fill(request, entry[2])
+    return holes.fill(request, _render_shell(request, render))
+
+
+def _wait_for_entry(request, key_prefix, version, lock):
+    """Ждёт запись, которую кладёт взявший блокировку; None — не дождались.
+
+    Ожидание кончается и раньше срока, если блокировку сняли, а записи
+    нет: первый рендер оказался не для кэша.
+    """
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+        entry = cache.get(key) if key else None
+        if entry is not None and entry[0] == version:
+            return entry
+        if cache.get(lock) is None:
+            return None
+    return None
+
+
+def _render_shell(request, render):
+    """Рендер оболочки с дырами.
+
+    Долгий срок действует только на сервере: браузер каждый раз сверяет
+    страницу по ETag, а ``private`` не даёт прокси раздавать страницу с
+    чужими персональными фрагментами.
+    """
+    request.punch_holes = True
+    try:
+        response = render()
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+    finally:
+        request.punch_holes = False
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cache_exempt(view):
+    """Не кэшировать view в PageCacheMiddleware."""
+    view.page_cache_exempt = True
+    return view
+
+
+def cache_page_versioned(timeout, *scopes, grace=None):
+    """Кэш страницы, свежесть которой зависит от поколений областей.
+
+    Области — строки-шаблоны (``'group:{slug}'``) или функции
+    ``(request, *args, **kwargs)``. Любая запись, сдвинувшая поколение,
+    сразу делает закэшированную страницу устаревшей, поэтому timeout
+    может быть большим.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            names = resolve_scopes(scopes, request, *args, **kwargs)
+            key_prefix = '%s:%s' % (view.__name__, hashlib.md5(
+                ':'.join(names).encode()).hexdigest())
+            return cached_response(
+                request, lambda: view(request, *args, **kwargs),
+                key_prefix, signature(names), timeout, grace
+            )
+        wrapper.page_cached = True
+        return wrapper
+    return decorator
+
+
+def condition_versioned(*scopes):
+    """ETag и Last-Modified из поколений областей, без рендера страницы.
+
+    Поколения сдвигаются ровно при тех записях, которые меняют страницу
+    (пост, комментарии, лента), поэтому время сдвига служит временем
+    последнего изменения. В ETag входит и посетитель: персональные
+    фрагменты у каждого свои. В Last-Modified посетителя не уложить,
+    поэтому вошедшим он не отдаётся и страница сверяется только по ETag.
+    """
+    def tokens(request, *args, **kwargs):
+        return generations(resolve_scopes(scopes, request, *args, **kwargs))
+
+    def etag(request, *args, **kwargs):
+        viewer = request.user.pk if request.user.is_authenticated else '-'
+        return hashlib.md5(':'.join(
+            [str(viewer), *tokens(request, *args, **kwargs)]
+        ).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return changed_at(tokens(request, *args, **kwargs))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
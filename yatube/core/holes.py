@@ -0,0 +1,56 @@
+import base64
+import json
+import re
+
+from django.template.loader import render_to_string
+
+MARKER = re.compile(r'<!--hole:([A-Za-z0-9_-]+)-->')
+
+_providers = {}
+
+
+def provider(template_name):
+    """Регистрирует функцию, дополняющую контекст «дырки» по запросу."""
+    def decorator(func):
+        _providers[template_name] = func
+        return func
+    return decorator
+
+
+def render_hole(request, template_name, params):
+    context = dict(params)
+    if template_name in _providers:
+        context.update(_providers[template_name](request, **params))
+    return render_to_string(template_name, context, request=request)
+
+
+def marker(template_name, params):
+    payload = json.dumps([template_name, params], separators=(',', ':'))
+    token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+    return f'<!--hole:{token}-->'
+
+
+def _render_marker(request, match):
+    token = match.group(1)
+    payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    template_name, params = json.loads(payload.decode())
+    return render_hole(request, template_name, params)
+
+
+def fill(request, response):
+    """Заполняет «дырки» закэшированной оболочки страницы.
+
+    Оболочка общая для всех посетителей; сюда попадают только
+    персональные части: шапка, кнопка подписки, форма комментария.
+    Метки ищутся только в HTML: там пользовательский текст экранирован
+    и подделать метку нельзя.
+    """
+    if (response.streaming
+            or not response.get('Content-Type', '').startswith('text/html')):
+        return response
+    content = response.content.decode(response.charset)
+    if '<!--hole:' not in content:
+        return response
+    response.content = MARKER.sub(
+        lambda match: _render_marker(request, match), content)
+    return response
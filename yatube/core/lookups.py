@@ -0,0 +1,63 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import Http404
+
+LOOKUP_TIMEOUT = 60 * 60 * 24
+MISSING_TIMEOUT = 30
+MISSING = 'missing'
+# Поля, которые не кладутся в общий кэш (он лежит на диске); при
+# обращении они дочитываются из базы.
+SECRET_FIELDS = ('password',)
+
+
+def lookup_key(model, field, value):
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return f'lookup:{model._meta.label_lower}:{field}:{digest}'
+
+
+def _values(obj):
+    return {field.attname: getattr(obj, field.attname)
+            for field in obj._meta.concrete_fields
+            if field.name not in SECRET_FIELDS}
+
+
+def _instance(model, values):
+    """Объект из значений полей; недостающие поля отложены (deferred)."""
+    return model.from_db(model._default_manager.db, list(values),
+                         list(values.values()))
+
+
+def get_cached(model, **lookup):
+    """Объект по уникальному полю через кэш; None, если объекта нет.
+
+    В кэше лежат значения полей без ``SECRET_FIELDS``. Промах тоже
+    кэшируется, но ненадолго: поток запросов к несуществующим адресам
+    не доходит до базы.
+    """
+    (field, value), = lookup.items()
+    key = lookup_key(model, field, value)
+    values = cache.get(key)
+    if values is None:
+        obj = model._default_manager.filter(**lookup).first()
+        cache.set(key, MISSING if obj is None else _values(obj),
+                  MISSING_TIMEOUT if obj is None else LOOKUP_TIMEOUT)
+        return obj
+    return None if values == MISSING else _instance(model, values)
+
+
+def get_cached_or_404(model, **lookup):
+    obj = get_cached(model, **lookup)
+    if obj is None:
+        raise Http404(f'No {model._meta.object_name} matches the given query.')
+    return obj
+
+
+def evict(model, **lookup):
+    """Убирает из кэша записи по перечисленным значениям полей."""
+    cache.delete_many([
+        lookup_key(model, field, value)
+        for field, values in lookup.items()
+        for value in (values if isinstance(values, (list, tuple, set))
+                      else [values])
+    ])
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (override_settings, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+
+from core import benchmark
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет запросы, время и размер ответа маршрутов posts, '
+            'users и about на тестовой базе и сверяет с бюджетами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--budgets', default=settings.BENCHMARK_BUDGETS)
+        parser.add_argument('--report', default=settings.BENCHMARK_REPORT)
+        parser.add_argument(
+            '--update-budgets', action='store_true',
+            help='Записать бюджеты по текущим замерам вместо проверки.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES,
+                                   NPLUSONE_MODE='off'):
+                results = self.run(options)
+        finally:
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+
+        if options['update_budgets']:
+            benchmark.dump(benchmark.budgets_for(results),
+                           options['budgets'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Бюджеты записаны в {options["budgets"]}'))
+            return
+        failures = benchmark.compare(results,
+                                     benchmark.load(options['budgets']))
+        benchmark.dump({'routes': results, 'failures': failures},
+                       options['report'])
+        if failures:
+            raise CommandError('Бюджеты превышены:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(
+            f'Маршрутов в бюджете: {len(results)}; '
+            f'отчёт в {options["report"]}'))
+
+    def run(self, options):
+        user, values = benchmark.seed(options['seed'])
+        results = {}
+        for name, url in benchmark.routes(values):
+            results[name] = benchmark.measure(user, url, options['repeat'])
+            self.stdout.write(
+                '{name}: {queries} запросов, p50 {p50_ms} мс, '
+                'p95 {p95_ms} мс, {bytes} байт'.format(
+                    name=name, **results[name]))
+        return results
@@ -0,0 +1,155 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from django.template.base import Template
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время обработки запроса', TIME_BUCKETS, 'wall'),
+    'yatube_request_sql_queries': (
+        'Число SQL-запросов за запрос', COUNT_BUCKETS, 'queries'),
+    'yatube_request_sql_duration_seconds': (
+        'Время SQL-запросов за запрос', TIME_BUCKETS, 'sql'),
+    'yatube_request_template_duration_seconds': (
+        'Время рендера шаблонов за запрос', TIME_BUCKETS, 'template'),
+}
+
+_local = threading.local()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Гистограммы и счётчики процесса в разрезе имени view."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.cache = defaultdict(int)
+
+    def record(self, view, sample):
+        with self.lock:
+            for name, (_, buckets, field) in HISTOGRAMS.items():
+                histogram = self.histograms.get((name, view))
+                if histogram is None:
+                    histogram = self.histograms[name, view] = Histogram(
+                        buckets)
+                histogram.observe(sample[field])
+            self.cache[view, 'hit'] += sample['hits']
+            self.cache[view, 'miss'] += sample['misses']
+
+    def exposition(self):
+        """Текст в формате Prometheus (text/plain; version=0.0.4)."""
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets, _) in HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}',
+                          f'# TYPE {name} histogram']
+                for (metric, view), histogram in sorted(
+                        self.histograms.items()):
+                    if metric != name:
+                        continue
+                    label = f'view="{_escape(view)}"'
+                    total = 0
+                    for bound, count in zip(
+                            [*buckets, '+Inf'], histogram.counts):
+                        total += count
+                        lines.append(
+                            f'{name}_bucket{{{label},le="{bound}"}} {total}')
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+            name = 'yatube_cache_requests_total'
+            lines += [f'# HELP {name} Обращения к кэшу по результату',
+                      f'# TYPE {name} counter']
+            for (view, result), count in sorted(self.cache.items()):
+                lines.append(f'{name}{{view="{_escape(view)}",'
+                             f'result="{result}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+registry = Registry()
+
+
+def start():
+    """Начинает сбор показателей текущего запроса в этом потоке."""
+    _local.sample = {'queries': 0, 'sql': 0.0, 'template': 0.0,
+                     'hits': 0, 'misses': 0}
+    _local.depth = 0
+    return _local.sample
+
+
+def current(field):
+    """Значение показателя текущего запроса; 0 вне запроса."""
+    sample = getattr(_local, 'sample', None)
+    return sample[field] if sample is not None else 0
+
+
+def finish(view, wall):
+    sample = getattr(_local, 'sample', None)
+    _local.sample = None
+    if sample is not None:
+        sample['wall'] = wall
+        registry.record(view, sample)
+    return sample
+
+
+def count_cache(hit):
+    """Вызывается бэкендом кэша на каждое чтение."""
+    sample = getattr(_local, 'sample', None)
+    if sample is not None:
+        sample['hits' if hit else 'misses'] += 1
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """execute_wrapper: число и время SQL-запросов текущего запроса."""
+    start_time = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample = getattr(_local, 'sample', None)
+        if sample is not None:
+            sample['queries'] += 1
+            sample['sql'] += time.perf_counter() - start_time
+
+
+def instrument_templates():
+    """Оборачивает Template.render; вложенные include не считаются дважды."""
+    original = Template.render
+    if getattr(original, 'instrumented', False):
+        return
+
+    def render(self, context):
+        sample = getattr(_local, 'sample', None)
+        if sample is None or _local.depth:
+            return original(self, context)
+        _local.depth = 1
+        start_time = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            _local.depth = 0
+            sample['template'] += time.perf_counter() - start_time
+
+    render.instrumented = True
+    Template.render = render
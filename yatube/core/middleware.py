@@ -0,0 +1,115 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, nplusone, profiling
+from .cache import cached_response, signature
+
+PAGE_CACHE_SCOPES = ('site', 'posts')
+
+
+class PageCacheMiddleware:
+    """Кэш страниц для анонимных GET-запросов к остальным view.
+
+    Использует ту же защиту от одновременного пересчёта, что и
+    ``cache_page_versioned``; view, уже обёрнутые этим декоратором,
+    пропускаются. Страницы устаревают при любой записи в областях
+    ``PAGE_CACHE_SCOPES``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.timeout = getattr(settings, 'CACHE_MIDDLEWARE_SECONDS', 600)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or getattr(view_func, 'page_cached', False)
+                or getattr(view_func, 'page_cache_exempt', False)
+                or request.user.is_authenticated):
+            return None
+        return cached_response(
+            request, lambda: view_func(request, *view_args, **view_kwargs),
+            f'page:{view_func.__module__}.{view_func.__name__}',
+            signature(PAGE_CACHE_SCOPES), self.timeout
+        )
+
+
+class MetricsMiddleware:
+    """Время запроса, SQL, рендер шаблонов и кэш в разрезе view.
+
+    Данные копятся в памяти процесса (``core.metrics.registry``) и
+    отдаются view ``core.views.metrics``. Накладные расходы — пара
+    счётчиков на запрос, поэтому middleware можно держать включённым.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument_templates()
+
+    def __call__(self, request):
+        metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.sql_wrapper))
+                return self.get_response(request)
+        finally:
+            match = getattr(request, 'resolver_match', None)
+            metrics.finish(match.view_name if match else '<unresolved>',
+                           time.perf_counter() - started)
+
+
+class ProfilingMiddleware:
+    """Снимок cProfile запроса по выборке или по заголовку от staff.
+
+    Включается ``PROFILE_SAMPLE_RATE`` (доля запросов) или заголовком
+    ``PROFILE_HEADER`` у сотрудника; снимки кладутся в ``PROFILE_DIR``
+    и видны в админке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling.wanted(request):
+            return profiling.capture(request, self.get_response)
+        return self.get_response(request)
+
+
+class NPlusOneMiddleware:
+    """Ищет повторяющиеся запросы по связанным объектам (N+1).
+
+    Режим берётся из ``NPLUSONE_VIEWS`` (шаблоны имён view), иначе из
+    ``NPLUSONE_MODE``: ``'raise'`` (тесты) проверяет каждый запрос и
+    бросает ``NPlusOneError``, ``'log'`` проверяет долю
+    ``NPLUSONE_SAMPLE_RATE`` и пишет предупреждение со строкой шаблона.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not nplusone.enabled():
+            return self.get_response(request)
+        detector = request.nplusone = nplusone.Detector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(detector))
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            nplusone.report(detector, match.view_name)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        detector = getattr(request, 'nplusone', None)
+        if detector is not None:
+            detector.mode = nplusone.request_mode(
+                request.resolver_match.view_name)
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileCapture',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('view_name', models.CharField(max_length=200, verbose_name='View')),
+                ('path', models.CharField(max_length=2000, verbose_name='Адрес')),
+                ('duration', models.FloatField(verbose_name='Время, мс')),
+                ('query_count', models.PositiveIntegerField(verbose_name='SQL-запросов')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Файл')),
+            ],
+            options={
+                'verbose_name': 'Профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ('-pub_date',),
+            },
+        ),
+    ]
@@ -9,3 +9,20 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ProfileCapture(CreatedModel):
+    """Снимок cProfile одного запроса; файл лежит в PROFILE_DIR."""
+    view_name = models.CharField('View', max_length=200)
+    path = models.CharField('Адрес', max_length=2000)
+    duration = models.FloatField('Время, мс')
+    query_count = models.PositiveIntegerField('SQL-запросов')
+    file_name = models.CharField('Файл', max_length=255)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self):
+        return f'{self.view_name} {self.duration:.0f} мс'
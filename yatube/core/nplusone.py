@@ -0,0 +1,110 @@
+import fnmatch
+import logging
+import os
+import random
+import re
+import sys
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger('yatube.nplusone')
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+SPACES = re.compile(r'\s+')
+# Обращение к связанному полю: выборка по первичному или внешнему ключу.
+RELATED_ROW = re.compile(
+    r'^SELECT .* WHERE "\w+"\."(?:id|\w+_id)" = %s(?: LIMIT \d+)?$')
+
+DJANGO_DIR = os.path.dirname(sys.modules['django'].__file__)
+# Обёртки execute, которые не нужно показывать как место запроса.
+WRAPPERS = {__file__, metrics.__file__}
+
+
+class NPlusOneError(Exception):
+    """Один и тот же запрос по связанному объекту повторяется в цикле."""
+
+
+def fingerprint(sql):
+    """Форма запроса без значений: списки IN схлопываются."""
+    return SPACES.sub(' ', IN_LIST.sub('IN (...)', sql)).strip()
+
+
+def attribution():
+    """Строка шаблона и место в коде, откуда пришёл запрос."""
+    template = code = None
+    frame = sys._getframe(2)
+    while frame is not None and not (template and code):
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template = f'{origin.template_name}:{token.lineno}'
+        filename = frame.f_code.co_filename
+        if (code is None and not filename.startswith(DJANGO_DIR)
+                and 'site-packages' not in filename
+                and filename not in WRAPPERS):
+            code = f'{filename}:{frame.f_lineno}'
+        frame = frame.f_back
+    return template, code
+
+
+class Detector:
+    """execute_wrapper, считающий запросы одной формы за запрос."""
+
+    def __init__(self):
+        self.seen = {}
+        # Включается, когда известен view и его режим (process_view).
+        self.mode = 'off'
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.mode == 'off':
+            return execute(sql, params, many, context)
+        shape = fingerprint(sql)
+        if RELATED_ROW.match(shape):
+            if shape in self.seen:
+                self.seen[shape][0] += 1
+            else:
+                self.seen[shape] = [1, attribution()]
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return [(shape, count, where)
+                for shape, (count, where) in self.seen.items()
+                if count >= threshold]
+
+
+def mode_for(view_name):
+    """Режим для view: NPLUSONE_VIEWS (шаблоны имён) или общий."""
+    for pattern, mode in settings.NPLUSONE_VIEWS.items():
+        if fnmatch.fnmatchcase(view_name, pattern):
+            return mode
+    return settings.NPLUSONE_MODE
+
+
+def enabled():
+    """Есть ли хоть один view, который нужно проверять."""
+    return settings.NPLUSONE_MODE != 'off' or any(
+        mode != 'off' for mode in settings.NPLUSONE_VIEWS.values())
+
+
+def request_mode(view_name):
+    """Режим этого запроса: 'log' срабатывает на доле запросов."""
+    mode = mode_for(view_name)
+    if mode == 'log' and random.random() >= settings.NPLUSONE_SAMPLE_RATE:
+        return 'off'
+    return mode
+
+
+def report(detector, view_name):
+    if detector.mode == 'off':
+        return
+    for shape, count, (template, code) in detector.repeated(
+            settings.NPLUSONE_THRESHOLD):
+        message = (f'N+1 в {view_name}: {count} запросов вида {shape!r}; '
+                   f'шаблон {template or "-"}, код {code or "-"}')
+        if detector.mode == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
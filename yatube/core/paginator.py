@@ -0,0 +1,206 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Max, Min, Q
+from django.utils.functional import cached_property
+
+from .cache import generations
+
+COUNT_CACHE_TIMEOUT = 60 * 60
+APPROXIMATE_THRESHOLD = 100000
+PAGES_ON_EACH_SIDE = 2
+
+
+def encode_cursor(values, reverse=False, number=None):
+    """Упаковывает значения ключа сортировки в непрозрачный токен.
+
+    ``number`` — номер страницы, на которую ведёт токен, если он известен.
+    """
+    if values is not None:
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    payload = json.dumps([values, int(reverse), number],
+                         separators=(',', ':'))
+    token = base64.urlsafe_b64encode(payload.encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен в (values, reverse, number) или None."""
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values, reverse, *rest = json.loads(payload.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if values is not None and not isinstance(values, list):
+        return None
+    number = rest[0] if rest and isinstance(rest[0], int) else None
+    return values, bool(reverse), number
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу сортировки (keyset).
+
+    Страница выбирается условием ``WHERE (pub_date, id) < (...)`` вместо
+    ``OFFSET``, поэтому не нужен ни ``COUNT(*)``, ни просмотр пропущенных
+    строк. Старые ссылки вида ``?page=N`` обслуживаются обычным
+    ``Paginator.get_page``.
+
+    Если заданы ``count_scopes``, общее число объектов кэшируется под
+    поколениями этих областей (см. ``core.cache``), а у страницы
+    появляется окно номеров ``page_window``. С ``approximate=True``
+    для неотфильтрованной большой таблицы число оценивается по
+    диапазону первичного ключа.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-pk'), count_scopes=None,
+                 approximate=False, **kwargs):
+        self.ordering = tuple(ordering)
+        self.count_scopes = count_scopes
+        self.approximate = approximate
+        self.count_is_approximate = False
+        super().__init__(
+            object_list.order_by(*self.ordering), per_page, **kwargs
+        )
+
+    @cached_property
+    def count(self):
+        if self.count_scopes is None:
+            return self._count()
+        signature = '%s:%s' % (
+            self.object_list.order_by().query,
+            ':'.join(generations(self.count_scopes)),
+        )
+        key = 'count:%s' % hashlib.md5(signature.encode()).hexdigest()
+        cached = cache.get(key)
+        if cached is None:
+            cached = (self._count(), self.count_is_approximate)
+            cache.set(key, cached, COUNT_CACHE_TIMEOUT)
+        count, self.count_is_approximate = cached
+        return count
+
+    def _count(self):
+        if self.approximate and not self.object_list.query.where:
+            bounds = self.object_list.order_by().aggregate(
+                low=Min('pk'), high=Max('pk'))
+            if bounds['high'] is None:
+                return 0
+            estimate = bounds['high'] - bounds['low'] + 1
+            if estimate >= APPROXIMATE_THRESHOLD:
+                self.count_is_approximate = True
+                return estimate
+        return self.object_list.count()
+
+    @property
+    def last_cursor(self):
+        number = self.num_pages if self.count_scopes is not None else None
+        return encode_cursor(None, reverse=True, number=number)
+
+    def page_window(self, number):
+        """Номера страниц вокруг текущей; None обозначает пропуск."""
+        if number is None or self.count_scopes is None:
+            return []
+        last = self.num_pages
+        low = max(number - PAGES_ON_EACH_SIDE, 1)
+        high = min(number + PAGES_ON_EACH_SIDE, last)
+        window = list(range(low, high + 1))
+        if low > 1:
+            window[:0] = [1, None] if low > 2 else [1]
+        if high < last:
+            window += [None, last] if high < last - 1 else [last]
+        return window
+
+    def get_cursor_page(self, cursor=None, number=None):
+        position = self.decode(cursor)
+        if position is None and number not in (None, '', '1', 1):
+            page = self.get_page(number)
+            page.object_list = list(page.object_list)
+            has_previous, has_next = page.has_previous(), page.has_next()
+        else:
+            values, reverse, number = position or (None, False, 1)
+            queryset = self.object_list
+            if values is not None:
+                queryset = queryset.filter(self._seek(values, reverse))
+            if reverse:
+                queryset = queryset.reverse()
+            items = list(queryset[:self.per_page + 1])
+            has_more = len(items) > self.per_page
+            del items[self.per_page:]
+            if reverse:
+                items.reverse()
+                has_previous, has_next = has_more, values is not None
+            else:
+                has_previous, has_next = values is not None, has_more
+            page = self._get_page(items, number, self)
+        items = page.object_list
+        number = page.number
+        page.previous_cursor = (
+            self.encode(items[0], reverse=True, number=number and number - 1)
+            if has_previous and items else None
+        )
+        page.next_cursor = (
+            self.encode(items[-1], number=number and number + 1)
+            if has_next and items else None
+        )
+        page.page_window = self.page_window(number)
+        return page
+
+    def encode(self, item, reverse=False, number=None):
+        return encode_cursor(
+            [self._value(item, field) for field in self.ordering],
+            reverse, number
+        )
+
+    def decode(self, token):
+        position = decode_cursor(token)
+        if position is None or position[0] is None:
+            return position
+        values, reverse, number = position
+        if len(values) != len(self.ordering) or None in values:
+            return None
+        try:
+            values = [
+                self._field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            return None
+        return values, reverse, number
+
+    def _field(self, field):
+        name = field.lstrip('-')
+        annotations = self.object_list.query.annotations
+        if name in annotations:
+            return annotations[name].output_field
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    @staticmethod
+    def _value(item, field):
+        name = field.lstrip('-')
+        if isinstance(item, dict):
+            return item[name]
+        return getattr(item, name)
+
+    def _seek(self, values, reverse):
+        """Условие «строго после ключа» в порядке сортировки."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            branch = Q(**{f'{name}__{lookup}': values[index]})
+            for prefix, value in zip(self.ordering[:index], values):
+                branch &= Q(**{prefix.lstrip('-'): value})
+            condition |= branch
+        return condition
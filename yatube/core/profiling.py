@@ -0,0 +1,65 @@
+import cProfile
+import os
+import random
+import time
+import uuid
+
+from django.conf import settings
+
+from . import metrics
+from .models import ProfileCapture
+
+
+def wanted(request):
+    """Снимать ли профиль: по доле запросов или по заголовку от staff."""
+    header = 'HTTP_' + settings.PROFILE_HEADER.upper().replace('-', '_')
+    if request.META.get(header) and request.user.is_staff:
+        return True
+    rate = settings.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def capture(request, get_response):
+    """Выполняет запрос под cProfile и сохраняет снимок."""
+    profiler = cProfile.Profile()
+    queries_before = metrics.current('queries')
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Уже работает другой профилировщик.
+        return get_response(request)
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    duration = (time.perf_counter() - started) * 1000
+    match = getattr(request, 'resolver_match', None)
+    view_name = match.view_name if match else '<unresolved>'
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    file_name = '%s-%s-%s.prof' % (
+        time.strftime('%Y%m%d%H%M%S'), view_name.replace(':', '.'),
+        uuid.uuid4().hex[:8])
+    profiler.dump_stats(os.path.join(settings.PROFILE_DIR, file_name))
+    ProfileCapture.objects.create(
+        view_name=view_name,
+        path=request.get_full_path()[:2000],
+        duration=duration,
+        query_count=metrics.current('queries') - queries_before,
+        file_name=file_name,
+    )
+    rotate()
+    return response
+
+
+def rotate(keep=None):
+    """Оставляет только последние ``PROFILE_KEEP`` снимков."""
+    keep = settings.PROFILE_KEEP if keep is None else keep
+    stale = ProfileCapture.objects.order_by('-pub_date', '-pk')[keep:]
+    for file_name in stale.values_list('file_name', flat=True):
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, file_name))
+        except FileNotFoundError:
+            pass
+    ProfileCapture.objects.filter(
+        pk__in=list(stale.values_list('pk', flat=True))).delete()
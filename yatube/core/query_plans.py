@@ -0,0 +1,41 @@
+import re
+
+from django.db import connection
+
+FULL_SCAN_RE = re.compile(r'^SCAN (\S+)$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def explain(sql, params=()):
+    """Строки EXPLAIN QUERY PLAN для запроса (только SQLite)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(sql, params=()):
+    """Сортировки во временном B-дереве и полные просмотры таблиц.
+
+    Просмотр по индексу (``SCAN t USING INDEX``) и виртуальные таблицы
+    проблемой не считаются: их обход упорядочен и обрывается LIMIT.
+    """
+    return [
+        detail for detail in explain(sql, params)
+        if TEMP_SORT in detail or FULL_SCAN_RE.match(detail)
+    ]
+
+
+def check_queries(queries):
+    """Проверяет SELECT-запросы из CaptureQueriesContext.captured_queries.
+
+    Возвращает список пар (sql, проблемы) для запросов с плохим планом.
+    """
+    report = []
+    for query in queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        problems = plan_problems(sql)
+        if problems:
+            report.append((sql, problems))
+    return report
@@ -0,0 +1,20 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **params):
+    """Персональный фрагмент страницы.
+
+    При рендере оболочки для кэша вместо фрагмента выводится метка,
+    которую ``core.holes.fill`` заменяет на каждом запросе. Параметры
+    должны быть простыми значениями: они сохраняются в метке.
+    """
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        return mark_safe(holes.marker(template_name, params))
+    return holes.render_hole(request, template_name, params)
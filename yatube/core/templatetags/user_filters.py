@@ -6,3 +6,15 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.simple_tag(takes_context=True)
+def querystring(context, **kwargs):
+    """Текущие GET-параметры с заменой переданных; None удаляет параметр."""
+    params = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = value
+    return f'?{params.urlencode()}'
@@ -1,4 +1,27 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template import Context, Origin, Template
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
+from django.utils.cache import get_cache_key
+
+from posts import seeding
+from posts.models import Post
+
+from . import benchmark, metrics, nplusone
+from .cache import bump, cached_response, lock_key
+from .middleware import NPlusOneMiddleware
+from .models import ProfileCapture
+from .tiered_cache import TieredCache
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -8,3 +31,336 @@ class ViewTestClass(TestCase):
         # Проверьте, что статус ответа сервера - 404
         # Проверьте, что используется шаблон core/404.html
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return TieredCache(self.location, {'OPTIONS': options})
+
+    def test_second_read_is_served_from_memory(self):
+        cache = self.make_cache()
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        cache._l1.entries.clear()
+        cache._l1.size = 0
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertIsNone(cache.get('missing'))
+        stats = cache.stats()
+        self.assertEqual((stats['l1']['hits'], stats['l1']['misses']), (2, 2))
+        self.assertEqual((stats['l2']['hits'], stats['l2']['misses']), (1, 1))
+
+    def test_memory_is_bounded_by_bytes(self):
+        cache = self.make_cache(MAX_BYTES=1000, COMPRESS_MIN_SIZE=10 ** 6)
+        for number in range(10):
+            cache.set(f'key{number}', 'x' * 300)
+        self.assertLessEqual(cache.stats()['l1']['bytes'], 1000)
+        self.assertNotIn(cache.make_key('key0'), cache._l1.entries)
+        self.assertEqual(cache.get('key0'), 'x' * 300)
+
+    def test_large_values_are_compressed(self):
+        cache = self.make_cache(COMPRESS_MIN_SIZE=100)
+        cache.set('page', 'строка ' * 1000)
+        compressed, data, _ = cache._l1.entries[cache.make_key('page')]
+        self.assertTrue(compressed)
+        self.assertLess(len(data), 1000)
+        self.assertEqual(cache.get('page'), 'строка ' * 1000)
+
+    def test_other_process_sees_writes_through_disk(self):
+        cache = self.make_cache()
+        cache.set('key', 'old')
+        cache.get('key')
+        other = TieredCache(self.location, {})
+        other._l2.set('key', 'new')
+        with mock.patch('core.tiered_cache.time.monotonic',
+                        return_value=time.monotonic() + 10):
+            self.assertEqual(cache.get('key'), 'new')
+
+    def test_disk_limits_come_from_options(self):
+        cache = self.make_cache(MAX_ENTRIES=5000, CULL_FREQUENCY=10)
+        self.assertEqual(cache._l2._max_entries, 5000)
+        self.assertEqual(cache._l2._cull_frequency, 10)
+
+    def test_add_replaces_only_expired_keys(self):
+        cache = self.make_cache()
+        self.assertTrue(cache.add('lock', 1))
+        self.assertFalse(cache.add('lock', 2))
+        cache._l2.set('lock', 1, 0)
+        self.assertTrue(cache.add('lock', 3))
+        self.assertEqual(cache.get('lock'), 3)
+
+    def test_add_loses_to_write_after_check(self):
+        cache = self.make_cache()
+        other = TieredCache(self.location, {})
+        with mock.patch.object(cache._l2, '_cull',
+                               lambda: other._l2.set('lock', 'other')):
+            self.assertFalse(cache.add('lock', 'mine'))
+        self.assertEqual(cache.get('lock'), 'other')
+        self.assertEqual(os.listdir(self.location),
+                         [os.path.basename(cache._l2._key_to_file('lock'))])
+
+    def test_add_keeps_fresh_key_written_after_expiry_check(self):
+        cache = self.make_cache()
+        other = TieredCache(self.location, {})
+        other._l2.set('lock', 'other')
+        expired = mock.Mock(side_effect=[True, False])
+        with mock.patch.object(cache, '_expired', expired):
+            self.assertFalse(cache.add('lock', 'mine'))
+        self.assertEqual(expired.call_count, 2)
+        self.assertEqual(cache.get('lock'), 'other')
+        self.assertEqual(os.listdir(self.location),
+                         [os.path.basename(cache._l2._key_to_file('lock'))])
+
+
+class SingleFlightPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/page/')
+        self.renders = 0
+
+    def render(self):
+        self.renders += 1
+        return HttpResponse(f'render {self.renders}')
+
+    def get(self, version='v1', timeout=60):
+        return cached_response(self.request, self.render, 'page', version,
+                               timeout).content.decode()
+
+    def test_fresh_entry_is_reused(self):
+        self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(self.get(), 'render 1')
+
+    def test_stale_copy_served_while_another_worker_recomputes(self):
+        self.get()
+        lock = lock_key(self.request, 'page')
+        cache.add(lock, 1)
+        self.assertEqual(self.get(version='v2'), 'render 1')
+        self.assertEqual(self.renders, 1)
+        cache.delete(lock)
+        self.assertEqual(self.get(version='v2'), 'render 2')
+
+    def test_waits_for_first_render_without_copy(self):
+        self.get()
+        key = get_cache_key(self.request, 'page', 'GET', cache=cache)
+        cache.delete(key)
+        cache.add(lock_key(self.request, 'page'), 1)
+        with mock.patch('core.cache.LOCK_WAIT', 0):
+            self.assertEqual(self.get(), 'render 2')
+
+    def test_cold_cache_waits_for_first_render(self):
+        lock = lock_key(self.request, 'page')
+        cache.add(lock, 1)
+
+        def first_render_done(seconds):
+            cache.delete(lock)
+            cached_response(self.request, lambda: HttpResponse('first'),
+                            'page', 'v1', 60)
+
+        with mock.patch('core.cache.time.sleep',
+                        side_effect=first_render_done):
+            self.assertEqual(self.get(), 'first')
+        self.assertEqual(self.renders, 0)
+
+    def test_stops_waiting_when_first_render_is_not_cached(self):
+        lock = lock_key(self.request, 'page')
+        cache.add(lock, 1)
+        release = mock.Mock(side_effect=lambda seconds: cache.delete(lock))
+        with mock.patch('core.cache.time.sleep', release):
+            self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(release.call_count, 1)
+
+    def test_middleware_caches_anonymous_pages(self):
+        self.assertTemplateUsed(self.client.get('/about/tech/'),
+                                'about/tech.html')
+        self.assertTemplateNotUsed(self.client.get('/about/tech/'),
+                                   'about/tech.html')
+        bump('site')
+        self.assertTemplateUsed(self.client.get('/about/tech/'),
+                                'about/tech.html')
+
+    def test_pages_with_csrf_token_are_not_shared(self):
+        self.client.get('/auth/signup/')
+        visitor = Client(enforce_csrf_checks=True)
+        visitor.get('/auth/signup/')
+        response = visitor.post('/auth/signup/', {
+            'username': 'newcomer',
+            'password1': 'Very-secret-42',
+            'password2': 'Very-secret-42',
+            'csrfmiddlewaretoken': visitor.cookies['csrftoken'].value,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(User.objects.filter(username='newcomer').exists())
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get('/')
+        self.client.get('/')
+        body = self.client.get('/metrics/').content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      body)
+        self.assertRegex(
+            body, r'yatube_request_sql_queries_count\{view="posts:index"\} '
+                  r'[1-9]')
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"}', body)
+        self.assertRegex(
+            body, r'yatube_request_template_duration_seconds_sum'
+                  r'\{view="posts:index"\} 0\.\d+')
+        self.assertRegex(body, r'yatube_cache_requests_total'
+                               r'\{view="posts:index",result="hit"\} [1-9]')
+
+    def test_metrics_only_for_local_addresses(self):
+        response = self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = metrics.Registry()
+        for wall in (0.001, 0.2, 20):
+            registry.record('view', {'wall': wall, 'queries': 3, 'sql': 0,
+                                     'template': 0, 'hits': 0, 'misses': 1})
+        body = registry.exposition()
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="view",le="0.005"} 1', body)
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="view",le="0.25"} 2', body)
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="view",le="+Inf"} 3', body)
+        self.assertIn('yatube_request_sql_queries_sum{view="view"} 9', body)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_patch = override_settings(PROFILE_DIR=self.directory,
+                                           PROFILE_KEEP=2)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+        self.staff = User.objects.create_user(username='staff',
+                                              is_staff=True)
+        self.reader = User.objects.create_user(username='reader')
+
+    def test_staff_header_captures_request(self):
+        self.client.force_login(self.staff)
+        self.client.get('/', HTTP_X_PROFILE='1')
+        capture = ProfileCapture.objects.get()
+        self.assertEqual(capture.view_name, 'posts:index')
+        self.assertGreater(capture.query_count, 0)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, capture.file_name)))
+
+    def test_header_ignored_for_non_staff(self):
+        self.client.force_login(self.reader)
+        self.client.get('/', HTTP_X_PROFILE='1')
+        self.assertFalse(ProfileCapture.objects.exists())
+
+    def test_sampling_and_rotation(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            for _ in range(3):
+                self.client.get('/about/tech/')
+        self.assertEqual(ProfileCapture.objects.count(), 2)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+
+class NPlusOneTests(TestCase):
+    LOOP = '{% for post in posts %}\n{{ post.author.username }}{% endfor %}'
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            author = User.objects.create_user(username=f'author{number}')
+            Post.objects.create(text='Текст', author=author)
+
+    def request(self, posts, view_name='posts:index'):
+        template = Template(self.LOOP, origin=Origin(
+            'loop.html', template_name='loop.html'))
+
+        def view(request):
+            request.resolver_match = mock.Mock(view_name=view_name)
+            middleware.process_view(request, view, (), {})
+            return HttpResponse(template.render(Context({'posts': posts})))
+
+        middleware = NPlusOneMiddleware(view)
+        return middleware(RequestFactory().get('/'))
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            nplusone.fingerprint('SELECT 1 WHERE "a"."id" IN (%s, %s)'),
+            nplusone.fingerprint('SELECT 1  WHERE "a"."id" IN (%s)'))
+
+    def test_lazy_related_loads_raise_with_template_line(self):
+        with self.assertRaisesMessage(nplusone.NPlusOneError,
+                                      'шаблон loop.html:2'):
+            self.request(Post.objects.all())
+
+    def test_select_related_passes(self):
+        response = self.request(Post.objects.select_related('author'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_sampled_production_traffic_logs(self):
+        with override_settings(NPLUSONE_MODE='log', NPLUSONE_SAMPLE_RATE=1):
+            with self.assertLogs('yatube.nplusone', 'WARNING') as logs:
+                self.request(Post.objects.all())
+        self.assertIn('posts:index', logs.output[0])
+
+    def test_view_can_be_switched_off(self):
+        with override_settings(NPLUSONE_VIEWS={'legacy:*': 'off'}):
+            response = self.request(Post.objects.all(), 'legacy:list')
+        self.assertEqual(response.status_code, 200)
+
+    def test_view_mode_applies_outside_the_sample(self):
+        with override_settings(NPLUSONE_MODE='off', NPLUSONE_SAMPLE_RATE=0,
+                               NPLUSONE_VIEWS={'posts:*': 'raise'}):
+            with self.assertRaises(nplusone.NPlusOneError):
+                self.request(Post.objects.all())
+            response = self.request(Post.objects.all(), 'about:tech')
+        self.assertEqual(response.status_code, 200)
+
+    def test_unsampled_log_requests_are_not_checked(self):
+        with override_settings(NPLUSONE_MODE='log', NPLUSONE_SAMPLE_RATE=0):
+            with self.assertRaises(AssertionError):
+                with self.assertLogs('yatube.nplusone', 'WARNING'):
+                    self.request(Post.objects.all())
+
+
+class BenchmarkTests(TestCase):
+    def test_every_route_is_measured(self):
+        user, values = benchmark.seed(1, seeding.Scale(
+            users=5, groups=2, posts=20, comments=10, follows=2, images=0))
+        results = {name: benchmark.measure(user, url, repeat=1)
+                   for name, url in benchmark.routes(values)}
+        self.assertIn('posts:index', results)
+        self.assertIn('about:tech', results)
+        self.assertNotIn('posts:profile_follow', results)
+        self.assertIn('?q=', results['posts:search']['url'])
+        for name, result in results.items():
+            self.assertEqual(result['status'], 200, name)
+        self.assertEqual(
+            benchmark.compare(results, benchmark.budgets_for(results)), [])
+
+    def test_regressions_and_missing_budgets_fail(self):
+        results = {
+            'posts:index': {'status': 200, 'queries': 6, 'p95_ms': 10,
+                            'bytes': 100},
+            'posts:profile': {'status': 404, 'queries': 1, 'p95_ms': 5,
+                              'bytes': 50},
+            'about:tech': {'status': 200, 'queries': 2, 'p95_ms': 10,
+                           'bytes': 100},
+        }
+        budget = {'status': 200, 'queries': 5, 'p95_ms': 50, 'bytes': 1000}
+        budgets = {'posts:index': budget, 'posts:profile': budget}
+        self.assertEqual(benchmark.compare(results, budgets), [
+            'posts:index: queries 6 > 5',
+            'posts:profile: статус 404 вместо 200',
+            'about:tech: нет бюджета',
+        ])
@@ -0,0 +1,227 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+from . import metrics
+
+
+class _Memory:
+    """Состояние L1, общее для всех потоков процесса (как у LocMemCache)."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.stats = {
+            'l1': {'hits': 0, 'misses': 0},
+            'l2': {'hits': 0, 'misses': 0},
+        }
+
+
+_memories = {}
+L1_OPTIONS = ('MAX_BYTES', 'L1_TIMEOUT', 'COMPRESS_MIN_SIZE')
+
+
+class TieredCache(BaseCache):
+    """Двухуровневый кэш: память процесса поверх общего файлового.
+
+    L1 — LRU в памяти процесса, ограниченный суммарным размером
+    значений в байтах; большие значения хранятся сжатыми. Записи L1
+    живут не дольше ``L1_TIMEOUT`` секунд, чтобы изменения, сделанные
+    другими процессами через L2, становились видны быстро.
+
+    L2 — ``FileBasedCache`` в каталоге ``LOCATION``, его видят все
+    рабочие процессы.
+
+    OPTIONS: ``MAX_BYTES`` (объём L1), ``L1_TIMEOUT``,
+    ``COMPRESS_MIN_SIZE`` (порог сжатия в байтах). Остальные опции
+    уходят в L2: ``MAX_ENTRIES`` — сколько файлов хранить (по умолчанию
+    у Django 300), ``CULL_FREQUENCY`` — какая доля (1/N) удаляется
+    при переполнении.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.max_bytes = int(options.get('MAX_BYTES', 16 * 1024 * 1024))
+        self.l1_timeout = int(options.get('L1_TIMEOUT', 5))
+        self.compress_min_size = int(options.get('COMPRESS_MIN_SIZE', 4096))
+        self._l2 = FileBasedCache(location, dict(params, OPTIONS={
+            key: value for key, value in options.items()
+            if key not in L1_OPTIONS
+        }))
+        self._l1 = _memories.setdefault(location, _Memory())
+        self._memory = self._l1.entries
+        self._stats = self._l1.stats
+        self._lock = self._l1.lock
+
+    def stats(self):
+        """Попадания и промахи по уровням и текущий объём L1."""
+        with self._lock:
+            return {
+                'l1': dict(self._stats['l1'], entries=len(self._memory),
+                           bytes=self._l1.size),
+                'l2': dict(self._stats['l2']),
+            }
+
+    def _encode(self, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) >= self.compress_min_size:
+            return True, zlib.compress(data)
+        return False, data
+
+    @staticmethod
+    def _decode(compressed, data):
+        return pickle.loads(zlib.decompress(data) if compressed else data)
+
+    def _l1_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[2] > time.monotonic():
+                self._memory.move_to_end(key)
+                self._stats['l1']['hits'] += 1
+                return entry
+            if entry is not None:
+                self._l1_drop(key)
+            self._stats['l1']['misses'] += 1
+            return None
+
+    def _l1_set(self, key, value, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        ttl = self.l1_timeout if timeout is None else min(
+            timeout, self.l1_timeout)
+        compressed, data = self._encode(value)
+        with self._lock:
+            self._l1_drop(key)
+            if ttl <= 0 or len(data) > self.max_bytes:
+                return
+            self._memory[key] = (compressed, data, time.monotonic() + ttl)
+            self._l1.size += len(data)
+            while self._l1.size > self.max_bytes:
+                _, (_, evicted, _) = self._memory.popitem(last=False)
+                self._l1.size -= len(evicted)
+
+    def _l1_drop(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._l1.size -= len(entry[1])
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_key(key, version=version)
+        self.validate_key(l1_key)
+        entry = self._l1_get(l1_key)
+        if entry is not None:
+            metrics.count_cache(hit=True)
+            return self._decode(entry[0], entry[1])
+        sentinel = object()
+        value = self._l2.get(key, sentinel, version=version)
+        with self._lock:
+            self._stats['l2']['misses' if value is sentinel else 'hits'] += 1
+        metrics.count_cache(hit=value is not sentinel)
+        if value is sentinel:
+            return default
+        self._l1_set(l1_key, value, self.l1_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_key(key, version=version)
+        self.validate_key(l1_key)
+        self._l2.set(key, value, timeout, version=version)
+        self._l1_set(l1_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Запись, только если ключа нет, — атомарно для всех процессов.
+
+        ``FileBasedCache.add`` проверяет и пишет двумя шагами, и два
+        процесса могут оба решить, что ключ свободен. Здесь файл
+        готовится во временном и ставится на место через ``os.link``:
+        поверх существующего файла ссылка не создаётся, поэтому ключ
+        получает ровно один процесс. Так ``add`` годится для блокировок.
+        """
+        l2 = self._l2
+        fname = l2._key_to_file(key, version)
+        l2._createdir()
+        try:
+            with open(fname, 'rb') as f:
+                expired = self._expired(f)
+        except FileNotFoundError:
+            expired = None
+        if expired is False:
+            return False
+        if expired and not self._remove_expired(fname):
+            return False
+        l2._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=l2._dir)
+        try:
+            with open(fd, 'wb') as f:
+                l2._write_content(f, timeout, value)
+            os.link(tmp_path, fname)
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+        self._l1_set(self.make_key(key, version=version), value, timeout)
+        return True
+
+    @staticmethod
+    def _expired(f):
+        """Истёк ли срок файла L2; в отличие от ``_is_expired`` не удаляет."""
+        try:
+            expires = pickle.load(f)
+        except EOFError:
+            return True
+        return expires is not None and expires < time.time()
+
+    def _remove_expired(self, fname):
+        """Убирает просроченный файл; False, если на его месте уже свежий.
+
+        Удалять по имени нельзя: между проверкой и удалением другой
+        процесс мог положить туда свой ключ. Файл сначала атомарно
+        переносится под уникальное имя и проверяется ещё раз; свежий
+        возвращается на место.
+        """
+        moved = f'{fname}.{uuid.uuid4().hex}.expired'
+        try:
+            os.rename(fname, moved)
+        except FileNotFoundError:
+            return True
+        try:
+            with open(moved, 'rb') as f:
+                if self._expired(f):
+                    return True
+            try:
+                os.link(moved, fname)
+            except FileExistsError:
+                pass
+            return False
+        finally:
+            os.remove(moved)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._lock:
+            self._l1_drop(self.make_key(key, version=version))
+        return self._l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        with self._lock:
+            self._l1_drop(self.make_key(key, version=version))
+        self._l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        sentinel = object()
+        return self.get(key, sentinel, version=version) is not sentinel
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._l1.size = 0
+        self._l2.clear()
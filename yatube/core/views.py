@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 
+from . import metrics as metrics_registry
+from .cache import cache_exempt
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +20,12 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@cache_exempt
+def metrics(request):
+    """Показатели процесса для Prometheus; доступны только с METRICS_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics_registry.registry.exposition(),
+                        content_type='text/plain; version=0.0.4')
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Post, Group
+from .search import to_match_query
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +11,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        query = to_match_query(search_term)
+        if not query:
+            return queryset, False
+        return queryset.filter(search__text__match=query), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,40 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def change(model, pk, field, delta):
+    """Атомарно сдвигает счётчик, не опуская его ниже нуля."""
+    if pk is None:
+        return
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def recount():
+    """Пересчитывает все счётчики по исходным таблицам."""
+    UserStats.objects.bulk_create(
+        UserStats(user_id=pk) for pk in
+        User.objects.filter(stats__isnull=True).values_list('pk', flat=True)
+    )
+    UserStats.objects.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+    Post.objects.update(comments_count=_count(Comment.objects.all(), 'post'))
+    Group.objects.update(posts_count=_count(Post.objects.all(), 'group'))
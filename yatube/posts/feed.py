@@ -0,0 +1,65 @@
+from django.db import connection
+
+from .models import FeedEntry, Follow, Post
+
+BATCH_SIZE = 1000
+
+
+def _batch_size(batch_size):
+    """Размер пачки в пределах бэкенда: bulk_create в Django 2.2 не
+    ограничивает заданный batch_size, а SQLite не примет 1000 строк."""
+    fields = [FeedEntry._meta.get_field(name)
+              for name in ('user', 'author', 'post', 'pub_date')]
+    return min(batch_size, connection.ops.bulk_batch_size(
+        fields, [None] * batch_size))
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = (Follow.objects
+                 .filter(author_id=post.author_id)
+                 .values_list('user_id', flat=True))
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, author_id=post.author_id,
+                   post_id=post.pk, pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=_batch_size(BATCH_SIZE),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id, batch_size=BATCH_SIZE):
+    """Добавляет в ленту подписчика все посты автора."""
+    posts = (Post.objects
+             .filter(author_id=author_id)
+             .values_list('pk', 'pub_date'))
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, author_id=author_id,
+                   post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts.iterator()),
+        batch_size=_batch_size(batch_size),
+        ignore_conflicts=True,
+    )
+
+
+def rebuild():
+    """Перестраивает все ленты одним ``INSERT … SELECT`` по Follow и Post."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in
+                        ('user_id', 'author_id', 'post_id', 'pub_date'))
+    FeedEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(FeedEntry._meta.db_table)} ({columns}) '
+            f'SELECT DISTINCT follow.{quote("user_id")}, '
+            f'follow.{quote("author_id")}, post.{quote("id")}, '
+            f'post.{quote("pub_date")} '
+            f'FROM {quote(Follow._meta.db_table)} follow '
+            f'JOIN {quote(Post._meta.db_table)} post '
+            f'ON post.{quote("author_id")} = follow.{quote("author_id")}'
+        )
+
+
+def purge(user_id, author_id):
+    """Убирает из ленты подписчика посты автора."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+
+from .models import Follow
+
+FOLLOWING_TIMEOUT = 60 * 60 * 24
+
+
+def _key(user_id):
+    return f'following:{user_id}'
+
+
+def followed_ids(user_id):
+    """Множество id авторов, на которых подписан пользователь."""
+    key = _key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Follow.objects
+                        .filter(user_id=user_id)
+                        .values_list('author_id', flat=True))
+        cache.set(key, ids, FOLLOWING_TIMEOUT)
+    return ids
+
+
+def is_following(user, author):
+    """Подписан ли пользователь на автора; ответ берётся из кэша."""
+    return user.is_authenticated and author.pk in followed_ids(user.pk)
+
+
+def evict(user_id):
+    cache.delete(_key(user_id))
+
+
+def posts_scope(author_id):
+    """Область постов автора; её сдвигает каждая запись его поста."""
+    return f'posts-of:{author_id}'
+
+
+def feed_scopes(user_id):
+    """Области кэша ленты: подписки читателя и посты каждого автора.
+
+    Лента сверяет поколения авторов при чтении, поэтому новый пост
+    сдвигает одно поколение, сколько бы подписчиков ни было у автора.
+    """
+    if user_id is None:
+        return [f'feed:{user_id}']
+    return [f'feed:{user_id}', *(
+        posts_scope(author_id)
+        for author_id in sorted(followed_ids(user_id)))]
@@ -0,0 +1,16 @@
+from core.holes import provider
+
+from . import following
+from .forms import CommentForm
+
+
+@provider('posts/includes/follow_button.html')
+def follow_button(request, author_id, **params):
+    user = request.user
+    return {'following': user.is_authenticated
+            and author_id in following.followed_ids(user.pk)}
+
+
+@provider('posts/includes/comment_form.html')
+def comment_form(request, **params):
+    return {'form': CommentForm()}
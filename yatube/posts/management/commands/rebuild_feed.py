@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feed
+from posts.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает ленты подписок (FeedEntry) по таблице Follow.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {FeedEntry.objects.count()}'
+        ))
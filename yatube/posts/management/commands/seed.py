@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, группами, '
+            'постами, комментариями, подписками и картинками.')
+
+    def add_arguments(self, parser):
+        defaults = seeding.Scale()
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Одно зерно — одни и те же данные.')
+        parser.add_argument('--users', type=int, default=defaults.users)
+        parser.add_argument('--groups', type=int, default=defaults.groups)
+        parser.add_argument('--posts', type=int, default=defaults.posts)
+        parser.add_argument('--comments', type=int,
+                            default=defaults.comments)
+        parser.add_argument('--follows', type=int, default=defaults.follows,
+                            help='Среднее число подписок пользователя.')
+        parser.add_argument('--images', type=float, default=defaults.images,
+                            help='Доля постов с картинкой.')
+        parser.add_argument('--image-pool', type=int,
+                            default=defaults.image_pool)
+        parser.add_argument('--days', type=int, default=defaults.days)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Число процессов; 0 — без них.')
+        parser.add_argument('--password', default=None,
+                            help='Общий пароль пользователей.')
+
+    def handle(self, *args, **options):
+        scale = seeding.Scale(
+            users=options['users'], groups=options['groups'],
+            posts=options['posts'], comments=options['comments'],
+            follows=options['follows'], images=options['images'],
+            image_pool=options['image_pool'], days=options['days'],
+        )
+        started = time.monotonic()
+        seeding.seed(scale, seed=options['seed'],
+                     workers=options['workers'],
+                     password=options['password'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.0f} с'))
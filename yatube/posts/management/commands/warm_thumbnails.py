@@ -0,0 +1,31 @@
+from multiprocessing.pool import ThreadPool
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+CHUNK_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = 'Заранее создаёт миниатюры для всех постов с картинками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        names = (Post.objects.exclude(image='')
+                 .values_list('image', flat=True).distinct())
+        done = total = 0
+        # Имена читаются из базы по мере работы пула, а результаты
+        # сразу сводятся в счётчики: память не растёт с числом постов.
+        with ThreadPool(options['workers']) as pool:
+            for result in pool.imap_unordered(thumbnails.warm_in_worker,
+                                              names.iterator(),
+                                              chunksize=CHUNK_SIZE):
+                done += result
+                total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок обработано: {done} из {total}'
+        ))
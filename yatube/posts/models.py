@@ -9,11 +9,30 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=50, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField('Число постов', default=0,
+                                              editable=False)
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    FEED_FIELDS = (
+        'text', 'pub_date', 'updated', 'image', 'comments_count',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__slug', 'group__title',
+    )
+
+    def for_feed(self):
+        """Посты для ленты: автор и группа в том же запросе."""
+        return (self.select_related('author', 'group')
+                .only('author', 'group', *self.FEED_FIELDS))
+
+    def for_detail(self):
+        """Пост вместе со счётчиками автора."""
+        return self.select_related('author__stats', 'group')
+
+
 class Post(CreatedModel):
     text = models.TextField(
         'Текст поста',
@@ -39,16 +58,67 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
+class FullTextField(models.TextField):
+    """Колонка таблицы FTS5, поддерживает lookup ``match``."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PostSearch(models.Model):
+    """Полнотекстовый индекс постов (виртуальная таблица FTS5).
+
+    Таблица и триггеры, которые синхронизируют её с posts_post,
+    создаются миграцией.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search'
+    )
+    text = FullTextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
+
+
 class Comment(CreatedModel):
     text = models.TextField(
         verbose_name='Текст комментария',
@@ -65,6 +135,12 @@ class Comment(CreatedModel):
         related_name='comments'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'pub_date'],
+                         name='comment_post_pub_date_idx'),
+        ]
+
     def __str__(self):
         return self.text[:15]
 
@@ -80,3 +156,59 @@ class Follow(CreatedModel):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'author'],
+                         name='follow_user_author_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые при записи."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField('Число подписчиков',
+                                                  default=0)
+    following_count = models.PositiveIntegerField('Число подписок',
+                                                  default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class FeedEntry(models.Model):
+    """Пост в ленте подписок пользователя (заполняется при записи)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-id'],
+                         name='feed_user_pub_date_idx'),
+        ]
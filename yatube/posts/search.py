@@ -0,0 +1,30 @@
+import re
+
+from django.db.models import F
+
+from .models import Post
+
+WORD_RE = re.compile(r'\w+')
+
+
+def to_match_query(text):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется по префиксу, слова
+    объединяются через AND; операторы FTS5 из ввода не проходят.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(text or ''))
+
+
+def search_posts(text, group=None, author=None):
+    """Посты, подходящие под запрос, с рангом bm25 (меньше — лучше)."""
+    query = to_match_query(text)
+    posts = Post.objects.for_feed().annotate(rank=F('search__rank'))
+    if not query:
+        return posts.none()
+    posts = posts.filter(search__text__match=query)
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    return posts
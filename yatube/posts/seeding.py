@@ -0,0 +1,294 @@
+"""Синтетические данные для стенда и замеров (команда ``seed``).
+
+Строки генерируются порциями; у каждой порции свой генератор случайных
+чисел, заданный зерном, таблицей и номером порции, поэтому результат не
+зависит от числа процессов и порядка их работы. Процессы только готовят
+строки, в базу пишет родительский процесс через ``bulk_create``.
+``bulk_create`` не вызывает сигналы, поэтому счётчики и ленты подписок
+потом пересчитываются командами ``recount`` и ``rebuild_feed``.
+"""
+import bisect
+import io
+import itertools
+import multiprocessing
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from core.cache import bump
+
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 5000
+# Показатели степенного распределения: чем больше, тем сильнее перекос
+# к первым (самым популярным) пользователям.
+FOLLOW_SKEW = 1.1
+AUTHOR_SKEW = 0.5
+# Перестановка номеров для авторов постов и комментариев: самые
+# плодовитые авторы не совпадают с самыми популярными.
+SHUFFLE_PRIME = 1000003
+IMAGE_SIZE = (640, 480)
+END = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+_fake = None
+_weights = {}
+
+
+class Scale:
+    """Объём данных и их форма."""
+
+    def __init__(self, users=10000, groups=100, posts=200000,
+                 comments=400000, follows=20, images=0.1, image_pool=200,
+                 days=365):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        # Среднее число подписок одного пользователя.
+        self.follows = follows
+        # Доля постов с картинкой; картинки берутся из общего пула.
+        self.images = images
+        self.image_pool = image_pool
+        self.days = days
+
+
+def fake(key):
+    """Faker процесса, перезаряженный зерном порции."""
+    global _fake
+    if _fake is None:
+        _fake = Faker('ru_RU')
+    _fake.seed_instance(key)
+    return _fake
+
+
+def rng(seed, table, index):
+    return random.Random(f'{seed}:{table}:{index}')
+
+
+def power_law(generator, count, skew):
+    """Номер от 0 до count - 1; номер 0 самый частый."""
+    weights = _weights.get((count, skew))
+    if weights is None:
+        weights = _weights[count, skew] = list(itertools.accumulate(
+            1 / (rank + 1) ** skew for rank in range(count)))
+    return bisect.bisect(weights, generator.random() * weights[-1])
+
+
+def writer(generator, count):
+    """Номер автора поста или комментария."""
+    rank = power_law(generator, count, AUTHOR_SKEW)
+    return (rank * SHUFFLE_PRIME + 1) % count
+
+
+def post_date(scale, number):
+    """Посты идут по времени в порядке номеров, как в живой базе."""
+    span = timedelta(days=scale.days)
+    return END - span + span * (number + 1) / max(scale.posts, 1)
+
+
+def chunks(total, size=CHUNK_SIZE):
+    for index, start in enumerate(range(0, total, size)):
+        yield index, start, min(size, total - start)
+
+
+def make_image(task):
+    seed, number = task
+    name = f'posts/seed/{seed}-{number}.png'
+    if not default_storage.exists(name):
+        generator = rng(seed, 'image', number)
+        image = Image.new('RGB', IMAGE_SIZE, tuple(
+            generator.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(8):
+            x, y = (generator.randrange(IMAGE_SIZE[0]),
+                    generator.randrange(IMAGE_SIZE[1]))
+            draw.rectangle(
+                (x, y, x + generator.randrange(40, 240),
+                 y + generator.randrange(40, 240)),
+                fill=tuple(generator.randrange(256) for _ in range(3)))
+        output = io.BytesIO()
+        image.save(output, 'PNG')
+        default_storage.save(name, ContentFile(output.getvalue()))
+    return name
+
+
+def user_rows(task):
+    seed, scale, base, (index, start, count) = task
+    faker = fake(f'{seed}:user:{index}')
+    return [{
+        'id': base.user + number,
+        'username': f'seed{seed}-{number}',
+        'first_name': faker.first_name(),
+        'last_name': faker.last_name(),
+        'email': f'seed{seed}-{number}@example.com',
+        'password': base.password,
+    } for number in range(start, start + count)]
+
+
+def group_rows(task):
+    seed, scale, base, (index, start, count) = task
+    faker = fake(f'{seed}:group:{index}')
+    return [{
+        'id': base.group + number,
+        'title': faker.sentence(nb_words=3).rstrip('.'),
+        'slug': f'seed{seed}-{number}',
+        'description': faker.paragraph(),
+    } for number in range(start, start + count)]
+
+
+def post_rows(task):
+    seed, scale, base, (index, start, count) = task
+    generator = rng(seed, 'post', index)
+    faker = fake(f'{seed}:post:{index}')
+    rows = []
+    for number in range(start, start + count):
+        date = post_date(scale, number)
+        has_group = scale.groups and generator.random() < 0.7
+        has_image = base.images and generator.random() < scale.images
+        rows.append({
+            'id': base.post + number,
+            'text': faker.text(max_nb_chars=generator.choice((200, 600))),
+            'author_id': base.user + writer(generator, scale.users),
+            'group_id': (base.group + power_law(
+                generator, scale.groups, AUTHOR_SKEW)
+                if has_group else None),
+            'image': generator.choice(base.images) if has_image else '',
+            'pub_date': date,
+            'updated': date,
+        })
+    return rows
+
+
+def comment_rows(task):
+    seed, scale, base, (index, start, count) = task
+    generator = rng(seed, 'comment', index)
+    faker = fake(f'{seed}:comment:{index}')
+    rows = []
+    for _ in range(count):
+        number = generator.randrange(scale.posts)
+        date = post_date(scale, number)
+        rows.append({
+            'text': faker.sentence(),
+            'author_id': base.user + writer(generator, scale.users),
+            'post_id': base.post + number,
+            'pub_date': min(date + timedelta(
+                hours=generator.expovariate(1 / 24)), END),
+        })
+    return rows
+
+
+def follow_rows(task):
+    """Подписки порции пользователей.
+
+    Число подписок у пользователя — с тяжёлым хвостом вокруг
+    ``scale.follows``, авторы выбираются по степенному закону, так что
+    у немногих авторов огромное число подписчиков.
+    """
+    seed, scale, base, (index, start, count) = task
+    generator = rng(seed, 'follow', index)
+    rows = []
+    for number in range(start, start + count):
+        wanted = min(round(generator.paretovariate(2) * scale.follows / 2),
+                     scale.users - 1)
+        authors = set()
+        for _ in range(wanted * 3):
+            if len(authors) == wanted:
+                break
+            author = power_law(generator, scale.users, FOLLOW_SKEW)
+            if author != number:
+                authors.add(author)
+        rows.extend({
+            'user_id': base.user + number,
+            'author_id': base.user + author,
+            'pub_date': END - timedelta(
+                days=generator.random() * scale.days),
+        } for author in sorted(authors))
+    return rows
+
+
+class Base:
+    """Первые свободные ключи и общие для порций значения."""
+
+    def __init__(self, password, images):
+        self.user = (User.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+        self.group = (Group.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+        self.post = (Post.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+        self.password = password
+        self.images = images
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Отключает auto_now и auto_now_add, чтобы сохранить заданные даты."""
+    fields = [(field, field.auto_now, field.auto_now_add)
+              for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed(scale, seed=1, workers=None, password=None, log=None):
+    """Заполняет базу; при ``workers=0`` всё делается в этом процессе.
+
+    Возвращает объект ``Base`` с первыми ключами вставленных строк.
+    """
+    pool = None
+    if workers != 0:
+        pool = multiprocessing.Pool(workers, initializer=django.setup)
+    run = pool.imap if pool else map
+    try:
+        images = list(run(make_image, (
+            (seed, number) for number in range(scale.image_pool)
+        ))) if scale.images else []
+        base = Base(make_password(password), images)
+        plan = (
+            (User, user_rows, scale.users),
+            (Group, group_rows, scale.groups),
+            (Post, post_rows, scale.posts),
+            (Comment, comment_rows, scale.comments),
+            (Follow, follow_rows, scale.users if scale.follows else 0),
+        )
+        with explicit_dates(Post, Comment, Follow):
+            for model, rows, total in plan:
+                tasks = ((seed, scale, base, chunk)
+                         for chunk in chunks(total))
+                created = 0
+                for batch in run(rows, tasks):
+                    with transaction.atomic():
+                        # Размер пачки INSERT выбирает бэкенд базы.
+                        model.objects.bulk_create(
+                            model(**row) for row in batch)
+                    created += len(batch)
+                if log:
+                    log(f'{model.__name__}: {created}')
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    # Ключи заданы явно, последовательности (PostgreSQL) нужно догнать.
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Group, Post]):
+            cursor.execute(sql)
+    call_command('recount', stdout=io.StringIO())
+    call_command('rebuild_feed', stdout=io.StringIO())
+    bump('site')
+    return base
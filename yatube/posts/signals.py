@@ -0,0 +1,156 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import lookups
+from core.cache import bump
+
+from . import feed, following, syndication, thumbnails
+from .counters import change
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def post_scopes(post):
+    """Области кэша, которые затрагивает запись поста.
+
+    Ленты подписчиков сверяют область постов автора сами
+    (``following.feed_scopes``), поэтому сдвигается одна область.
+    """
+    scopes = ['posts', f'post:{post.pk}', f'author:{post.author.username}',
+              following.posts_scope(post.author_id)]
+    if post.group_id:
+        scopes.append(f'group:{post.group.slug}')
+    return scopes
+
+
+def saved_value(instance, field, update_fields=None):
+    """Значение поля в базе до сохранения; None для новых объектов."""
+    if instance._state.adding or (update_fields is not None
+                                  and field not in update_fields):
+        return None
+    return (type(instance).objects.filter(pk=instance.pk)
+            .values_list(field, flat=True).first())
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    instance._saved_username = saved_value(instance, 'username',
+                                           update_fields)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+    elif update_fields != frozenset({'last_login'}):
+        bump('site')
+    lookups.evict(User, pk=instance.pk, session_hash=instance.pk, username=[
+        instance.username, getattr(instance, '_saved_username', None)])
+    bump(f'author:{instance.username}')
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    lookups.evict(User, pk=instance.pk, session_hash=instance.pk,
+                  username=instance.username)
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, update_fields=None, **kwargs):
+    instance._saved_slug = saved_value(instance, 'slug', update_fields)
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    lookups.evict(Group, slug=[
+        instance.slug, getattr(instance, '_saved_slug', None)])
+    bump('site')
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._saved_group_id, instance._saved_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image').first() or (None, '')
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    scopes = post_scopes(instance)
+    if instance.image and (
+            created
+            or instance.image.name != getattr(instance, '_saved_image', '')):
+        thumbnails.schedule(instance.image.name)
+    if created:
+        change(UserStats, instance.author_id, 'posts_count', 1)
+        change(Group, instance.group_id, 'posts_count', 1)
+        if instance.group_id:
+            lookups.evict(Group, slug=instance.group.slug)
+        feed.fan_out(instance)
+        syndication.update(instance)
+        bump(*scopes)
+        return
+    old_group_id = getattr(instance, '_saved_group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        change(Group, old_group_id, 'posts_count', -1)
+        change(Group, instance.group_id, 'posts_count', 1)
+        slugs = list(Group.objects
+                     .filter(pk__in=[old_group_id, instance.group_id])
+                     .values_list('slug', flat=True))
+        lookups.evict(Group, slug=slugs)
+        scopes.extend(f'group:{slug}' for slug in slugs)
+    syndication.update(instance, old_group_id)
+    bump(*scopes)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change(UserStats, instance.author_id, 'posts_count', -1)
+    change(Group, instance.group_id, 'posts_count', -1)
+    if instance.group_id:
+        lookups.evict(Group, slug=instance.group.slug)
+    syndication.remove(instance)
+    bump(*post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change(Post, instance.post_id, 'comments_count', 1)
+    bump(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change(Post, instance.post_id, 'comments_count', -1)
+    bump(f'post:{instance.post_id}')
+
+
+def follow_scopes(follow):
+    """Области, которые меняет подписка.
+
+    Счётчики подписок и подписчиков видны на страницах обоих
+    пользователей, посты автора — в ленте подписчика.
+    """
+    return [f'author:{follow.author.username}',
+            f'author:{follow.user.username}', f'feed:{follow.user_id}']
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        change(UserStats, instance.user_id, 'following_count', 1)
+        change(UserStats, instance.author_id, 'followers_count', 1)
+        feed.backfill(instance.user_id, instance.author_id)
+        following.evict(instance.user_id)
+        bump(*follow_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change(UserStats, instance.user_id, 'following_count', -1)
+    change(UserStats, instance.author_id, 'followers_count', -1)
+    feed.purge(instance.user_id, instance.author_id)
+    following.evict(instance.user_id)
+    bump(*follow_scopes(instance))
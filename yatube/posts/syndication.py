@@ -0,0 +1,227 @@
+from django.contrib.syndication.views import Feed
+from django.core import signing
+from django.core.cache import cache
+from django.http import Http404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from core.cache import signature
+from core.lookups import get_cached
+
+from . import following
+from .models import FeedEntry, Group, Post, User
+
+FEED_SIZE = 20
+ENTRIES_TIMEOUT = 60 * 60
+TOKEN_SALT = 'posts.follow-feed'
+
+ENTRY_VALUES = ('id', 'text', 'pub_date', 'updated', 'author__username',
+                'author__first_name', 'author__last_name', 'group__title')
+
+
+def follow_token(user):
+    """Подписанный токен личной ленты; по нему читатель не логинится."""
+    return signing.dumps(user.pk, salt=TOKEN_SALT)
+
+
+def token_user_id(token):
+    try:
+        return signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def follow_token_scope(request, token):
+    return following.feed_scopes(token_user_id(token))
+
+
+def _entry(row):
+    row = dict(row)
+    row['author_name'] = ' '.join(filter(None, (
+        row.pop('author__first_name'), row.pop('author__last_name')
+    ))) or row['author__username']
+    return row
+
+
+def _load(posts):
+    return [_entry(row) for row in
+            posts.order_by('-pub_date', '-id').values(*ENTRY_VALUES)
+            [:FEED_SIZE]]
+
+
+def _key(kind, value=''):
+    return f'syndication:{kind}:{value}'
+
+
+def entries(kind, value=''):
+    """Последние записи ленты из кэша; при промахе — один запрос."""
+    key = _key(kind, value)
+    rows = cache.get(key)
+    if rows is None:
+        posts = Post.objects.all()
+        if kind == 'group':
+            posts = posts.filter(group_id=value)
+        elif kind == 'author':
+            posts = posts.filter(author_id=value)
+        rows = _load(posts)
+        cache.set(key, rows, ENTRIES_TIMEOUT)
+    return rows
+
+
+def follow_entries(user_id):
+    """Записи личной ленты; ключ зависит от поколений её областей."""
+    key = _key('follow',
+               f'{user_id}:{signature(following.feed_scopes(user_id))}')
+    rows = cache.get(key)
+    if rows is None:
+        post_ids = (FeedEntry.objects.filter(user_id=user_id)
+                    .order_by('-pub_date', '-id')
+                    .values_list('post_id', flat=True)[:FEED_SIZE])
+        rows = _load(Post.objects.filter(pk__in=list(post_ids)))
+        cache.set(key, rows, ENTRIES_TIMEOUT)
+    return rows
+
+
+def _lists(post):
+    keys = [_key('all'), _key('author', post.author_id)]
+    if post.group_id:
+        keys.append(_key('group', post.group_id))
+    return keys
+
+
+def _drop(post_id, keys):
+    """Удаляет списки, где был пост: они перечитаются при промахе."""
+    for key in keys:
+        rows = cache.get(key)
+        if rows is not None and any(item['id'] == post_id for item in rows):
+            cache.delete(key)
+
+
+def update(post, old_group_id=None):
+    """Сбрасывает списки лент, где появился или изменился пост.
+
+    Списки не правятся на месте: в L1 другого процесса может лежать
+    копия без чужого свежего поста, и запись её обратно потеряла бы
+    его. Сброшенный список перечитается из базы при промахе.
+    """
+    keys = _lists(post)
+    if old_group_id and old_group_id != post.group_id:
+        keys.append(_key('group', old_group_id))
+    cache.delete_many(keys)
+
+
+def remove(post):
+    _drop(post.pk, _lists(post))
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def items(self, obj):
+        return entries('all')
+
+    def item_title(self, item):
+        return item['text'][:50]
+
+    def item_description(self, item):
+        return item['text']
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item['id']])
+
+    def item_pubdate(self, item):
+        return item['pub_date']
+
+    def item_updateddate(self, item):
+        return item['updated']
+
+    def item_author_name(self, item):
+        return item['author_name']
+
+    def item_categories(self, item):
+        return [item['group__title']] if item['group__title'] else []
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        group = get_cached(Group, slug=slug)
+        if group is None:
+            raise Http404
+        return group
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=[obj.slug])
+
+    def items(self, obj):
+        return entries('group', obj.pk)
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        author = get_cached(User, username=username)
+        if author is None:
+            raise Http404
+        return author
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def items(self, obj):
+        return entries('author', obj.pk)
+
+
+class FollowFeed(PostsFeed):
+    title = 'Yatube: мои подписки'
+    description = 'Новые записи авторов, на которых вы подписаны'
+
+    def get_object(self, request, token):
+        user_id = token_user_id(token)
+        if user_id is None:
+            raise Http404
+        return user_id
+
+    def link(self, obj):
+        return reverse('posts:follow_index')
+
+    def items(self, obj):
+        return follow_entries(obj)
+
+
+class PostsAtomFeed(PostsFeed):
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class FollowAtomFeed(FollowFeed):
+    feed_type = Atom1Feed
+    subtitle = FollowFeed.description
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..views import AMOUNT_COMMENTS
+
+User = get_user_model()
+
+EXTRA_COMMENTS = 5
+
+
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(AMOUNT_COMMENTS + EXTRA_COMMENTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.detail_url = reverse('posts:post_detail',
+                                  kwargs={'post_id': self.post.pk})
+        self.comments_url = reverse('posts:comments',
+                                    kwargs={'post_id': self.post.pk})
+
+    def test_detail_renders_first_slice(self):
+        comments = self.client.get(self.detail_url).context['comments']
+        self.assertEqual(len(comments), AMOUNT_COMMENTS)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        self.assertIsNotNone(comments.next_cursor)
+
+    def test_fragment_returns_next_batch(self):
+        cursor = self.client.get(self.detail_url).context['comments'] \
+            .next_cursor
+        response = self.client.get(self.comments_url, {'cursor': cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertContains(response, f'Комментарий {AMOUNT_COMMENTS}')
+        self.assertNotContains(response, 'Комментарий 0<')
+        self.assertNotContains(response, 'js-more-comments')
+
+    def test_fragment_json(self):
+        response = self.client.get(self.comments_url, {'format': 'json'})
+        data = response.json()
+        self.assertEqual(len(data['comments']), AMOUNT_COMMENTS)
+        self.assertEqual(data['comments'][0]['author'], self.user.username)
+        tail = self.client.get(self.comments_url, {
+            'format': 'json', 'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(tail['comments']), EXTRA_COMMENTS)
+        self.assertIsNone(tail['next_cursor'])
+
+    def test_add_comment_reaches_fragment(self):
+        self.client.force_login(self.user)
+        self.client.get(self.comments_url, {'format': 'json'})
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Свежий'})
+        data = self.client.get(self.comments_url, {'format': 'json'}).json()
+        tail = self.client.get(self.comments_url, {
+            'format': 'json', 'cursor': data['next_cursor']}).json()
+        self.assertEqual(tail['comments'][-1]['text'], 'Свежий')
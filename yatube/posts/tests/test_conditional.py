@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='etag_author')
+        cls.group = Group.objects.create(title='Группа', slug='etag',
+                                         description='Описание')
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'etag'}),
+            reverse('posts:profile', kwargs={'username': 'etag_author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_unchanged_pages_return_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                again = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(again.status_code, 304)
+                again = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(again.status_code, 304)
+
+    def test_browsers_revalidate_every_time(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                for _ in range(2):
+                    cache_control = self.client.get(url)['Cache-Control']
+                    self.assertIn('no-cache', cache_control)
+                    self.assertIn('private', cache_control)
+                    self.assertNotIn('max-age', cache_control)
+
+    def test_validators_change_with_content_and_viewer(self):
+        url = self.urls[-1]
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.author)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_last_modified_only_for_anonymous_viewers(self):
+        url = self.urls[0]
+        last_modified = self.client.get(url)['Last-Modified']
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.other_group = Group.objects.create(title='Другая', slug='other',
+                                               description='Описание')
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_and_group_counters(self):
+        post = Post.objects.create(author=self.author, text='Текст',
+                                   group=self.group)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        Comment.objects.create(author=self.reader, post=post, text='Ок')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        Follow.objects.all().delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_follower_pages_show_fresh_following_count(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+        profile = reverse('posts:profile', kwargs={'username': 'reader'})
+        api = reverse('api:profile', kwargs={'username': 'reader'})
+        follow = {'username': 'author'}
+        for action, count in (('posts:profile_follow', 1),
+                              ('posts:profile_unfollow', 0)):
+            etag = self.client.get(profile)['ETag']
+            self.client.get(api)
+            self.client.get(reverse(action, kwargs=follow))
+            with self.subTest(action=action):
+                response = self.client.get(profile, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, f'Подписок: {count}')
+                self.assertEqual(self.client.get(api).json()['profile'][
+                    'following_count'], count)
+
+    def test_recount_repairs_drift(self):
+        Post.objects.create(author=self.author, text='Текст',
+                            group=self.group)
+        UserStats.objects.all().delete()
+        Group.objects.update(posts_count=7)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
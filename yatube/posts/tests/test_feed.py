@@ -0,0 +1,95 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import following
+
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.old_post = Post.objects.create(author=cls.author,
+                                           text='Старый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def feed_posts(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'].object_list)
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': self.author}))
+        self.assertEqual(self.feed_posts(), [self.old_post])
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': self.author}))
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_posts(), [])
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.feed_posts(), [new_post, self.old_post])
+
+    def test_rebuild_feed_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertEqual(self.feed_posts(), [self.old_post])
+
+    def test_followed_ids_cached_until_follow_changes(self):
+        self.assertEqual(following.followed_ids(self.reader.pk), frozenset())
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(following.is_following(self.reader, self.author))
+        with self.assertNumQueries(0):
+            self.assertTrue(following.is_following(self.reader, self.author))
+        Follow.objects.all().delete()
+        self.assertFalse(following.is_following(self.reader, self.author))
+
+    def test_profile_following_check_does_not_query_follow(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        following.followed_ids(self.reader.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:profile', kwargs={'username': self.author}))
+        self.assertTrue(response.context['following'])
+        self.assertFalse(
+            [q for q in queries if 'posts_follow' in q['sql']])
+
+    def test_first_page_cached_until_followed_author_posts(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed_posts(), [self.old_post])
+        stranger = User.objects.create_user(username='stranger')
+        Post.objects.create(author=stranger, text='Чужой пост')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:follow_index'))
+        self.assertTemplateNotUsed(response, 'posts/follow.html')
+        self.assertFalse([q for q in queries if 'posts_' in q['sql']])
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.feed_posts(), [new_post, self.old_post])
+
+    def test_new_post_bumps_one_scope_for_all_followers(self):
+        for number in range(5):
+            follower = User.objects.create_user(username=f'follower{number}')
+            Follow.objects.create(user=follower, author=self.author)
+        with mock.patch('posts.signals.bump') as bump:
+            Post.objects.create(author=self.author, text='Новый пост')
+        scopes = [scope for call in bump.call_args_list for scope in call[0]]
+        self.assertIn(following.posts_scope(self.author.pk), scopes)
+        self.assertFalse([scope for scope in scopes
+                          if scope.startswith('feed:')])
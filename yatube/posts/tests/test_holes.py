@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class PageShellTests(TestCase):
+    """Оболочка страницы общая, персональные части — свои у каждого."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author_shell')
+        cls.reader = User.objects.create_user(username='reader_shell')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_as(self, user, url):
+        self.client.logout()
+        if user is not None:
+            self.client.force_login(user)
+        return self.client.get(url)
+
+    def test_post_detail_shell_is_shared(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.pk})
+        response = self.get_as(self.author, url)
+        self.assertContains(response, edit_url)
+        self.assertContains(response, 'Пользователь: author_shell')
+
+        response = self.get_as(self.reader, url)
+        self.assertTemplateNotUsed(response, 'posts/post_detail.html')
+        self.assertNotContains(response, edit_url)
+        self.assertNotContains(response, 'Пользователь: author_shell')
+        self.assertContains(response, 'Пользователь: reader_shell')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+        response = self.get_as(None, url)
+        self.assertTemplateNotUsed(response, 'posts/post_detail.html')
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    def test_follow_button_is_filled_per_request(self):
+        url = reverse('posts:profile', kwargs={'username': 'author_shell'})
+        self.assertContains(self.get_as(self.reader, url), 'Подписаться')
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.get_as(self.reader, url)
+        self.assertContains(response, 'Отписаться')
+        response = self.get_as(self.author, url)
+        self.assertNotContains(response, 'Отписаться')
+        self.assertNotContains(response, 'Подписаться')
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import lookups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class LookupCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_group_read_through_and_eviction(self):
+        lookups.get_cached(Group, slug='group')
+        with self.assertNumQueries(0):
+            self.assertEqual(lookups.get_cached(Group, slug='group'),
+                             self.group)
+        Post.objects.create(author=self.user, group=self.group, text='Пост')
+        self.assertEqual(
+            lookups.get_cached(Group, slug='group').posts_count, 1)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        self.assertIsNone(lookups.get_cached(Group, slug='group'))
+        self.assertEqual(lookups.get_cached(Group, slug='renamed'), group)
+
+    def test_missing_lookups_are_cached_briefly(self):
+        url = reverse('posts:profile', kwargs={'username': 'nobody'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertIsNone(lookups.get_cached(User, username='nobody'))
+        User.objects.create_user(username='nobody')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_session_user_comes_from_cache(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:index'))
+        self.user.first_name = 'Имя'
+        self.user.save()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.context['user'].first_name, 'Имя')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:post_create'))
+        self.assertFalse([q for q in queries if 'auth_user' in q['sql']])
+
+    def test_password_hash_is_not_cached(self):
+        user = User.objects.create_user(username='secret',
+                                        password='Old-secret-42')
+        self.client.login(username='secret', password='Old-secret-42')
+        self.client.get(reverse('posts:post_create'))
+        key = lookups.lookup_key(User, 'pk', user.pk)
+        self.assertNotIn('password', cache.get(key))
+        self.assertNotIn(user.password, str(cache.get(key)))
+
+    def test_password_change_keeps_own_session_and_ends_others(self):
+        User.objects.create_user(username='secret', password='Old-secret-42')
+        other = self.client_class()
+        for client in (self.client, other):
+            client.login(username='secret', password='Old-secret-42')
+            client.get(reverse('posts:post_create'))
+        response = self.client.post(reverse('password_change'), {
+            'old_password': 'Old-secret-42',
+            'new_password1': 'New-secret-42',
+            'new_password2': 'New-secret-42',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            self.client.get(reverse('posts:post_create')).status_code, 200)
+        self.assertEqual(
+            other.get(reverse('posts:post_create')).status_code, 302)
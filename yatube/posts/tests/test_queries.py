@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryShapeTests(TestCase):
+    """Число запросов страницы не зависит от числа постов на ней."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.post = cls.add_posts(1)[0]
+        Follow.objects.create(user=cls.reader, author=cls.post.author)
+
+    @classmethod
+    def add_posts(cls, amount):
+        posts = []
+        start = Post.objects.count()
+        for i in range(start, start + amount):
+            author = User.objects.create_user(username=f'author{i}',
+                                              first_name=f'Имя{i}')
+            Follow.objects.create(user=cls.reader, author=author)
+            posts.append(Post.objects.create(author=author, text=f'Пост {i}',
+                                             group=cls.group))
+        return posts
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_feeds_have_fixed_query_count(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:follow_index'),
+        )
+        before = {url: self.count_queries(url) for url in urls}
+        self.add_posts(9)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), before[url])
+
+    def test_post_detail_comments_have_fixed_query_count(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        Comment.objects.create(post=self.post, author=self.reader, text='1')
+        before = self.count_queries(url)
+        for i in range(5):
+            author = User.objects.create_user(username=f'commenter{i}')
+            Comment.objects.create(post=self.post, author=author, text='Ок')
+        self.assertEqual(self.count_queries(url), before)
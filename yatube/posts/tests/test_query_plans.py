@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.query_plans import check_queries
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц идут по индексам без сортировки в памяти."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        for i in range(15):
+            post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text=f'Пост {i}')
+            Comment.objects.create(post=post, author=cls.reader, text='Ок')
+        cls.post = post
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def assert_plans(self, url, params=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        report = check_queries(queries.captured_queries)
+        self.assertEqual(report, [], url)
+        return response
+
+    def test_views_use_indexes(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.assert_plans(url)
+                page_obj = response.context.get('page_obj')
+                if page_obj is not None and page_obj.next_cursor:
+                    self.assert_plans(url, {'cursor': page_obj.next_cursor})
+                    self.assert_plans(
+                        url, {'cursor': page_obj.paginator.last_cursor})
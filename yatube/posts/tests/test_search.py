@@ -0,0 +1,65 @@
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.best = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Котики котики котики')
+        cls.weak = Post.objects.create(author=cls.other,
+                                       text='Про котиков и собак')
+        Post.objects.create(author=cls.other, text='Только собаки')
+
+    def found(self, **params):
+        response = self.client.get(reverse('posts:search'), params)
+        return list(response.context['page_obj'].object_list)
+
+    def test_ranked_results(self):
+        self.assertEqual(self.found(q='КОТИК'), [self.best, self.weak])
+
+    def test_filters(self):
+        self.assertEqual(self.found(q='котик', group='group'), [self.best])
+        self.assertEqual(self.found(q='котик', author='other'), [self.weak])
+
+    def test_index_follows_edits_and_deletes(self):
+        weak = Post.objects.get(pk=self.weak.pk)
+        weak.text = 'Про хомяков'
+        weak.save()
+        self.assertEqual(self.found(q='котик'), [self.best])
+        Post.objects.get(pk=self.best.pk).delete()
+        self.assertEqual(self.found(q='котик'), [])
+
+    def test_fts_syntax_is_escaped(self):
+        self.assertEqual(self.found(q='"котики" (*'), [self.best])
+        self.assertEqual(self.found(q='!!!'), [])
+
+    def test_api_keyset_pagination(self):
+        for i in range(12):
+            Post.objects.create(author=self.other, text=f'Котики {i}')
+        url = reverse('posts:search_api')
+        first = self.client.get(url, {'q': 'котики'}).json()
+        second = self.client.get(
+            url, {'q': 'котики', 'cursor': first['next_cursor']}).json()
+        ids = [item['id'] for item in first['results'] + second['results']]
+        self.assertEqual(len(ids), 13)
+        self.assertEqual(len(set(ids)), 13)
+        self.assertEqual(ids[0], self.best.pk)
+        self.assertIsNone(second['next_cursor'])
+
+    def test_admin_search_uses_index(self):
+        admin = site._registry[Post]
+        request = RequestFactory().get('/')
+        queryset, _ = admin.get_search_results(
+            request, Post.objects.all(), 'собак')
+        self.assertEqual(queryset.count(), 2)
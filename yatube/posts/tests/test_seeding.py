@@ -0,0 +1,39 @@
+from collections import Counter
+
+from django.test import TestCase
+
+from .. import seeding
+from ..models import FeedEntry, Follow, Post, UserStats
+
+
+class SeedingTests(TestCase):
+    SCALE = seeding.Scale(users=200, groups=3, posts=300, comments=100,
+                          follows=5, images=0, days=30)
+
+    def test_same_seed_gives_same_rows(self):
+        base = seeding.Base(None, [])
+        task = (7, self.SCALE, base, (0, 0, 50))
+        self.assertEqual(seeding.post_rows(task), seeding.post_rows(task))
+        self.assertEqual(seeding.follow_rows(task),
+                         seeding.follow_rows(task))
+        self.assertNotEqual(
+            seeding.post_rows(task),
+            seeding.post_rows((8, self.SCALE, base, (0, 0, 50))))
+
+    def test_seed_fills_tables_and_derived_data(self):
+        base = seeding.seed(self.SCALE, seed=1, workers=0)
+        self.assertEqual(Post.objects.count(), 300)
+        first = Post.objects.get(pk=base.post)
+        last = Post.objects.get(pk=base.post + 299)
+        self.assertEqual(last.pub_date, seeding.END)
+        self.assertLess(first.pub_date, last.pub_date)
+        self.assertEqual(UserStats.objects.count(), 200)
+        self.assertTrue(FeedEntry.objects.exists())
+        followers = Counter(
+            Follow.objects.values_list('author_id', flat=True))
+        # Степенной закон: первые пользователи собирают львиную долю.
+        average = sum(followers.values()) / len(followers)
+        self.assertGreater(followers[base.user], 3 * average)
+        self.assertEqual(
+            UserStats.objects.get(pk=base.user).followers_count,
+            followers[base.user])
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import syndication
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='feed_author',
+                                              first_name='Лев')
+        cls.reader = User.objects.create_user(username='feed_reader')
+        cls.group = Group.objects.create(title='Лента', slug='feed',
+                                         description='Описание')
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Первая запись')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_render(self):
+        urls = [
+            reverse('posts:posts_rss'),
+            reverse('posts:posts_atom'),
+            reverse('posts:group_rss', args=['feed']),
+            reverse('posts:group_atom', args=['feed']),
+            reverse('posts:author_rss', args=['feed_author']),
+            reverse('posts:author_atom', args=['feed_author']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Первая запись')
+                self.assertContains(response, 'Лев')
+        self.assertEqual(self.client.get(
+            reverse('posts:group_rss', args=['missing'])).status_code, 404)
+
+    def test_entry_lists_follow_post_changes(self):
+        self.assertEqual(len(syndication.entries('all')), 1)
+        post = Post.objects.create(author=self.author, text='Вторая запись')
+        self.assertEqual([row['id'] for row in syndication.entries('all')],
+                         [post.pk, self.post.pk])
+        with self.assertNumQueries(0):
+            syndication.entries('all')
+        self.assertEqual(syndication.entries('group', self.group.pk)[0]['id'],
+                         self.post.pk)
+        post.group = self.group
+        post.save()
+        self.assertEqual(syndication.entries('group', self.group.pk)[0]['id'],
+                         post.pk)
+        post.delete()
+        self.assertEqual([row['id'] for row in syndication.entries('all')],
+                         [self.post.pk])
+
+    def test_stale_copy_does_not_lose_other_posts(self):
+        stale = syndication.entries('all')
+        first = Post.objects.create(author=self.author, text='Вторая запись')
+        get = cache.get
+        key = syndication._key('all')
+        with mock.patch.object(cache, 'get', lambda name, *args, **kwargs: (
+                stale if name == key else get(name, *args, **kwargs))):
+            second = Post.objects.create(author=self.author,
+                                         text='Третья запись')
+        self.assertEqual([row['id'] for row in syndication.entries('all')],
+                         [second.pk, first.pk, self.post.pk])
+
+    def test_conditional_get(self):
+        url = reverse('posts:posts_rss')
+        response = self.client.get(url)
+        again = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        Post.objects.create(author=self.author, text='Новая запись')
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(again, 'Новая запись')
+
+    def test_personal_feed_by_token(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        token = self.client.get(
+            reverse('posts:follow_index')).context['feed_token']
+        self.client.logout()
+        response = self.client.get(reverse('posts:follow_rss', args=[token]))
+        self.assertContains(response, 'Первая запись')
+        Follow.objects.all().delete()
+        response = self.client.get(reverse('posts:follow_atom', args=[token]))
+        self.assertNotContains(response, 'Первая запись')
+        self.assertEqual(self.client.get(
+            reverse('posts:follow_rss', args=['forged'])).status_code, 404)
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPregenerationTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+
+    def create_post(self):
+        image = SimpleUploadedFile('small.gif', SMALL_GIF,
+                                   content_type='image/gif')
+        return Post.objects.create(author=self.user, text='Текст',
+                                   image=image)
+
+    def test_image_upload_schedules_thumbnails_once(self):
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            post = self.create_post()
+            schedule.assert_called_once_with(post.image.name)
+            post.text = 'Новый текст'
+            post.save()
+            schedule.assert_called_once()
+
+    def test_warm_writes_thumbnail_files(self):
+        with mock.patch.object(thumbnails, 'schedule'):
+            post = self.create_post()
+        self.assertTrue(thumbnails.warm(post.image.name))
+        self.assertTrue(
+            os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'cache')))
+
+    def test_warm_reports_broken_image(self):
+        with self.assertLogs('posts.thumbnails', 'ERROR'):
+            self.assertFalse(thumbnails.warm('posts/missing.jpg'))
+
+    def test_prefetch_loads_page_with_one_query(self):
+        with mock.patch.object(thumbnails, 'schedule'):
+            posts = [self.create_post() for _ in range(3)]
+        for post in posts:
+            thumbnails.warm(post.image.name)
+        default.kvstore._lru.clear()
+        cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(posts)
+        cache.clear()
+        with self.assertNumQueries(0):
+            for post in posts:
+                geometry, options = thumbnails.GEOMETRIES[0]
+                self.assertTrue(
+                    get_thumbnail(post.image, geometry, **options).exists())
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 from django import forms
 from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
@@ -7,6 +8,10 @@ from django.urls import reverse
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.cache import bump
+from core.paginator import CursorPaginator, encode_cursor
 from ..models import Post, Group, Follow
 
 
@@ -135,17 +140,49 @@ class PostViewTests(TestCase):
 
     def test_posts_cache(self) -> None:
         """
-        Проверки, которые проверяют работу кеша главной страницы(index).
+        Главная страница берётся из кеша, пока не было записей,
+        и обновляется сразу после удаления поста.
         """
         response = self.guest_client.get(reverse('posts:index'))
         content = response.content
-        Post.objects.filter(group=self.group).delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
         response = self.guest_client.get(reverse('posts:index'))
         self.assertEqual(content, response.content)
-        cache.clear()
+        Post.objects.filter(group=self.group).delete()
         response = self.guest_client.get(reverse('posts:index'))
         self.assertNotEqual(content, response.content)
 
+    def test_writes_invalidate_cached_pages(self) -> None:
+        """Комментарий и подписка сразу обновляют пост и профиль."""
+        detail_url = reverse('posts:post_detail',
+                             kwargs={'post_id': self.post.id})
+        profile_url = reverse('posts:profile',
+                              kwargs={'username': self.user.username})
+        detail = self.guest_client.get(detail_url).content
+        profile = self.guest_client.get(profile_url).content
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': 'Свежий комментарий'})
+        Follow.objects.create(user=self.user2, author=self.user)
+        self.assertNotEqual(self.guest_client.get(detail_url).content, detail)
+        self.assertNotEqual(self.guest_client.get(profile_url).content,
+                            profile)
+
+    def test_article_fragment_is_shared_and_refreshed_on_edit(self):
+        """Кеш фрагмента поста общий для лент и сбрасывается правкой."""
+        follower_client = Client()
+        follower_client.force_login(self.user2)
+        Follow.objects.create(user=self.user2, author=self.user)
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        response = follower_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, self.post.text)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            {'text': 'Отредактированный текст', 'group': self.group.pk})
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Отредактированный текст')
+
     def test_posts_detail_uses_correct_context_first_page(self) -> None:
         """Проверка изображения в context"""
         response = self.guest_client.get(reverse(
@@ -184,6 +221,9 @@ class PaginatorViewsTest(TestCase):
         for i in range(13):
             Post.objects.create(author=cls.user, text=f'Текст{i}')
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains_ten_records(self):
         response = self.client.get(reverse('posts:index'))
 
@@ -195,3 +235,84 @@ class PaginatorViewsTest(TestCase):
 
         self.assertEqual(len(response.context.get('page_obj').object_list),
                          POST_IN_SECOND_PAGE)
+
+    def test_cursor_pages_walk_forward_and_back(self):
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        first_page = self.client.get(url).context['page_obj']
+        self.assertIsNone(first_page.previous_cursor)
+        second_page = self.client.get(
+            url, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertEqual(len(second_page.object_list), POST_IN_SECOND_PAGE)
+        self.assertIsNone(second_page.next_cursor)
+        back_page = self.client.get(
+            url, {'cursor': second_page.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back_page.object_list),
+                         list(first_page.object_list))
+        self.assertIsNone(back_page.previous_cursor)
+
+    def test_cursor_page_does_not_count(self):
+        url = reverse('posts:index')
+        cursor = self.client.get(url).context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'cursor': cursor})
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_last_and_broken_cursor(self):
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        page_obj = self.client.get(url).context['page_obj']
+        last_page = self.client.get(
+            url, {'cursor': page_obj.paginator.last_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(last_page.object_list), POST_IN_FIRST_PAGE)
+        self.assertIsNone(last_page.next_cursor)
+        broken_page = self.client.get(
+            url, {'cursor': 'not-a-cursor'}).context['page_obj']
+        self.assertEqual(list(broken_page.object_list),
+                         list(page_obj.object_list))
+        for values in ([None, None], [1, 2], [[1], {}]):
+            crafted_page = self.client.get(
+                url, {'cursor': encode_cursor(values)}).context['page_obj']
+            self.assertEqual(list(crafted_page.object_list),
+                             list(page_obj.object_list))
+
+    def test_page_window_follows_cursor(self):
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        first_page = self.client.get(url).context['page_obj']
+        self.assertEqual(first_page.page_window, [1, 2])
+        second_page = self.client.get(
+            url, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertEqual(second_page.number, 2)
+        last_page = self.client.get(
+            url, {'cursor': first_page.paginator.last_cursor}
+        ).context['page_obj']
+        self.assertEqual(last_page.number, 2)
+        paginator = CursorPaginator(Post.objects.all(), 1, count_scopes=())
+        self.assertEqual(paginator.page_window(7),
+                         [1, None, 5, 6, 7, 8, 9, None, 13])
+        self.assertEqual(paginator.page_window(2), [1, 2, 3, 4, None, 13])
+
+    def test_count_is_cached_until_write(self):
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.client.get(url)
+        bump('site')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()])
+        Post.objects.create(author=self.user, text='Ещё')
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 4)
+
+    def test_approximate_count_for_large_table(self):
+        posts = Post.objects.all()
+        with mock.patch('core.paginator.APPROXIMATE_THRESHOLD', 1):
+            paginator = CursorPaginator(posts, 10, approximate=True)
+            low, high = posts.order_by('pk').first().pk, posts.latest('pk').pk
+            self.assertEqual(paginator.count, high - low + 1)
+            self.assertTrue(paginator.count_is_approximate)
+            filtered = CursorPaginator(posts.filter(author=self.user), 10,
+                                       approximate=True)
+            self.assertEqual(filtered.count, 13)
+            self.assertFalse(filtered.count_is_approximate)
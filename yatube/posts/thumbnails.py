@@ -0,0 +1,144 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+logger = logging.getLogger(__name__)
+
+# Размеры, которые запрашивают шаблоны article.html и post_detail.html.
+GEOMETRIES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+WORKERS = 2
+LRU_SIZE = 10000
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS,
+                               thread_name_prefix='thumbnails')
+
+
+def warm(name):
+    """Создаёт миниатюры всех размеров; True, если всё получилось."""
+    try:
+        for geometry, options in GEOMETRIES:
+            if not get_thumbnail(name, geometry, **options).exists():
+                logger.error('Нет миниатюры %s для %s', geometry, name)
+                return False
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        return False
+    return True
+
+
+def warm_in_worker(name):
+    """warm() для пула потоков: закрывает соединение своего потока."""
+    try:
+        return warm(name)
+    finally:
+        connection.close()
+
+
+def schedule(name):
+    """Ставит картинку в очередь фоновых воркеров после коммита."""
+    transaction.on_commit(lambda: _executor.submit(warm_in_worker, name))
+
+
+def thumbnail_key(image, geometry, options):
+    """Ключ, под которым sorl ищет миниатюру в KVStore.
+
+    Повторяет подстановку опций по умолчанию из
+    ``ThumbnailBackend.get_thumbnail``.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def prefetch(posts):
+    """Загружает метаданные миниатюр всех постов страницы разом."""
+    keys = [
+        thumbnail_key(post.image, geometry, options)
+        for post in posts if post.image
+        for geometry, options in GEOMETRIES
+    ]
+    if keys and isinstance(default.kvstore, KVStore):
+        default.kvstore.prefetch(keys)
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """KVStore sorl с LRU в памяти процесса и пакетной загрузкой.
+
+    Запись о готовой миниатюре не меняется, поэтому в LRU хранятся
+    только найденные значения: промах всегда перепроверяется.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, value):
+        if value is None or value == cached_db_kvstore.EMPTY_VALUE:
+            return
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > LRU_SIZE:
+                self._lru.popitem(last=False)
+
+    def _get_raw(self, key):
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                return value
+        value = super()._get_raw(key)
+        self._remember(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        with self._lock:
+            for key in keys:
+                self._lru.pop(key, None)
+
+    def prefetch(self, keys):
+        """Один get_many к кэшу и не больше одного запроса к БД."""
+        with self._lock:
+            missing = [key for key in keys if key not in self._lru]
+        if not missing:
+            return
+        found = self.cache.get_many(missing)
+        absent = [key for key in missing if key not in found]
+        if absent:
+            rows = dict(KVStoreModel.objects.filter(key__in=absent)
+                        .values_list('key', 'value'))
+            loaded = {key: rows.get(key, cached_db_kvstore.EMPTY_VALUE)
+                      for key in absent}
+            self.cache.set_many(loaded,
+                                sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+            found.update(loaded)
+        for key, value in found.items():
+            self._remember(key, value)
@@ -12,7 +12,24 @@ urlpatterns = [
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('posts/<int:post_id>/comments/',
+         views.comments, name='comments'),
+    path('search/', views.search, name='search'),
+    path('search/api/', views.search_api, name='search_api'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('feeds/posts/rss/', views.posts_rss, name='posts_rss'),
+    path('feeds/posts/atom/', views.posts_atom, name='posts_atom'),
+    path('feeds/group/<slug:slug>/rss/', views.group_rss, name='group_rss'),
+    path('feeds/group/<slug:slug>/atom/', views.group_atom,
+         name='group_atom'),
+    path('feeds/profile/<str:username>/rss/', views.author_rss,
+         name='author_rss'),
+    path('feeds/profile/<str:username>/atom/', views.author_atom,
+         name='author_atom'),
+    path('feeds/follow/<str:token>/rss/', views.follow_rss,
+         name='follow_rss'),
+    path('feeds/follow/<str:token>/atom/', views.follow_atom,
+         name='follow_atom'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,18 +1,34 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db.models import Prefetch
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
-from .models import Post, Group, User, Follow
+from core.cache import cache_page_versioned, condition_versioned
+from core.lookups import get_cached, get_cached_or_404
+from core.paginator import CursorPaginator
+from . import following, syndication, thumbnails
+from .search import search_posts
+from .models import Post, Group, User, Follow, FeedEntry, Comment
 from .forms import PostForm, CommentForm
 
 AMOUNT_POST = 10
+AMOUNT_COMMENTS = 20
+PAGE_CACHE_TIMEOUT = 60 * 60 * 4
 
 
-@cache_page(20, key_prefix='index_page')
+def post_author_scope(request, post_id):
+    username = (Post.objects.filter(pk=post_id)
+                .values_list('author__username', flat=True).first())
+    return f'author:{username}'
+
+
+@condition_versioned('site', 'posts')
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'posts')
 def index(request):
     title = "Последние обновления на сайте"
-    posts = Post.objects.all()
-    page_obj = get_page_paginator(request, posts)
+    posts = Post.objects.for_feed()
+    page_obj = get_page_paginator(request, posts, ('posts',),
+                                  approximate=True)
+    thumbnails.prefetch(page_obj)
     context = {
         'title': title,
         'posts': posts,
@@ -21,40 +37,45 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@condition_versioned('site', 'group:{slug}')
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'group:{slug}')
 def group_list(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_page_paginator(request, posts)
+    group = get_cached_or_404(Group, slug=slug)
+    posts = group.posts.for_feed()
+    page_obj = get_page_paginator(request, posts, (f'group:{slug}',))
+    thumbnails.prefetch(page_obj)
     context = {'group': group,
                'posts': posts,
                'page_obj': page_obj}
     return render(request, 'posts/group_list.html', context)
 
 
+@condition_versioned('site', 'author:{username}')
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'author:{username}')
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    page_obj = get_page_paginator(request, posts)
+    author = get_cached_or_404(User, username=username)
+    posts = author.posts.for_feed()
+    page_obj = get_page_paginator(request, posts, (f'author:{username}',))
+    thumbnails.prefetch(page_obj)
     template = 'posts/profile.html'
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(user=request.user,
-                                          author=author).exists()
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following,
     }
     return render(request, template, context)
 
 
+@condition_versioned('site', 'post:{post_id}', post_author_scope)
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', 'post:{post_id}',
+                      post_author_scope)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.for_detail(), pk=post_id)
+    thumbnails.prefetch([post])
     post_title = post.text[:30]
-    comments = post.comments.all()
+    comments = get_comments_page(request, post.pk)
     form = CommentForm()
     author = post.author
-    author_posts = author.posts.all().count()
+    author_posts = author.stats.posts_count
     context = {
         "post": post,
         "post_title": post_title,
@@ -101,13 +122,41 @@ def post_edit(request, post_id):
     return render(request, "posts/create_post.html", context)
 
 
-def get_page_paginator(request, posts):
-    pagi = Paginator(posts, AMOUNT_POST)
-    page_number = request.GET.get('page')
-    page_obj = pagi.get_page(page_number)
+def get_page_paginator(request, posts, count_scopes=None, approximate=False):
+    pagi = CursorPaginator(posts, AMOUNT_POST, count_scopes=count_scopes,
+                           approximate=approximate)
+    page_obj = pagi.get_cursor_page(cursor=request.GET.get('cursor'),
+                                    number=request.GET.get('page'))
     return page_obj
 
 
+def get_comments_page(request, post_id):
+    comments = Comment.objects.filter(post_id=post_id).select_related('author')
+    pagi = CursorPaginator(comments, AMOUNT_COMMENTS,
+                           ordering=('pub_date', 'pk'))
+    return pagi.get_cursor_page(cursor=request.GET.get('cursor'))
+
+
+@cache_page_versioned(PAGE_CACHE_TIMEOUT, 'post:{post_id}')
+def comments(request, post_id):
+    page_obj = get_comments_page(request, post_id)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [{
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'pub_date': comment.pub_date,
+            } for comment in page_obj],
+            'next_cursor': page_obj.next_cursor,
+        })
+    context = {
+        'comments': page_obj,
+        'post_id': post_id,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
@@ -119,31 +168,112 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def follow_scope(request):
+    return following.feed_scopes(request.user.pk)
+
+
 @login_required
 def follow_index(request):
-    posts = (
-        Post.objects
-        .select_related('author', 'group')
-        .filter(author__following__user=request.user))
-    page_obj = get_page_paginator(request, posts)
+    """Лента подписок; первая страница кэшируется для каждого читателя."""
+    if request.GET:
+        return follow_page(request)
+    return cached_follow_page(request)
+
+
+def follow_page(request):
+    entries = (
+        FeedEntry.objects
+        .filter(user=request.user)
+        .only('pub_date', 'post')
+        .prefetch_related(
+            Prefetch('post', Post.objects.for_feed().order_by())))
+    page_obj = get_page_paginator(request, entries, follow_scope(request))
+    page_obj.object_list = [entry.post for entry in page_obj.object_list]
+    thumbnails.prefetch(page_obj)
     template = 'posts/follow.html'
     context = {
         'page_obj': page_obj,
+        'feed_token': syndication.follow_token(request.user),
     }
     return render(request, template, context)
 
 
+cached_follow_page = cache_page_versioned(
+    PAGE_CACHE_TIMEOUT, 'site', follow_scope)(follow_page)
+
+
 @login_required
 def profile_follow(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
-    if user != author:
+    author = get_cached_or_404(User, username=username)
+    if user != author and not following.is_following(user, author):
         Follow.objects.get_or_create(user=user, author=author)
     return redirect('posts:profile', author)
 
 
 @login_required
 def profile_unfollow(request, username):
-    Follow.objects.filter(user=request.user,
-                          author__username=username).delete()
+    author = get_cached(User, username=username)
+    if author is not None:
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username)
+
+
+def get_search_page(request):
+    posts = search_posts(request.GET.get('q'),
+                         group=request.GET.get('group'),
+                         author=request.GET.get('author'))
+    pagi = CursorPaginator(posts, AMOUNT_POST, ordering=('rank', 'pk'))
+    return pagi.get_cursor_page(cursor=request.GET.get('cursor'))
+
+
+def search(request):
+    page_obj = get_search_page(request)
+    thumbnails.prefetch(page_obj)
+    context = {
+        'query': request.GET.get('q', ''),
+        'groups': Group.objects.only('slug', 'title'),
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def search_api(request):
+    page_obj = get_search_page(request)
+    results = [{
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'rank': post.rank,
+    } for post in page_obj]
+    return JsonResponse({
+        'results': results,
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
+def feed_view(feed, *scopes):
+    """RSS/Atom-лента с кэшем страницы и условным GET по поколениям."""
+    def view(request, *args, **kwargs):
+        response = feed(request, *args, **kwargs)
+        # Last-Modified выставит condition: по времени сдвига поколения.
+        del response['Last-Modified']
+        return response
+    view.__name__ = type(feed).__name__
+    return condition_versioned(*scopes)(
+        cache_page_versioned(PAGE_CACHE_TIMEOUT, 'site', *scopes)(view))
+
+
+posts_rss = feed_view(syndication.PostsFeed(), 'posts')
+posts_atom = feed_view(syndication.PostsAtomFeed(), 'posts')
+group_rss = feed_view(syndication.GroupFeed(), 'group:{slug}')
+group_atom = feed_view(syndication.GroupAtomFeed(), 'group:{slug}')
+author_rss = feed_view(syndication.AuthorFeed(), 'author:{username}')
+author_atom = feed_view(syndication.AuthorAtomFeed(), 'author:{username}')
+follow_rss = feed_view(syndication.FollowFeed(),
+                       syndication.follow_token_scope)
+follow_atom = feed_view(syndication.FollowAtomFeed(),
+                        syndication.follow_token_scope)
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from core.lookups import LOOKUP_TIMEOUT, get_cached, lookup_key
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Хэш пароля в кэш не попадает: для проверки сессии кэшируется только
+    ``get_session_auth_hash()`` — то же значение, что хранится в сессии.
+    """
+
+    def get_user(self, user_id):
+        model = get_user_model()
+        user = get_cached(model, pk=user_id)
+        if user is None or not self.user_can_authenticate(user):
+            return None
+        key = lookup_key(model, 'session_hash', user.pk)
+        session_hash = cache.get(key)
+        if session_hash is None:
+            session_hash = user.get_session_auth_hash()
+            cache.set(key, session_hash, LOOKUP_TIMEOUT)
+
+        def get_session_auth_hash():
+            # После set_password хэш считается заново по новому паролю.
+            if 'password' in user.__dict__:
+                return model.get_session_auth_hash(user)
+            return session_hash
+
+        user.get_session_auth_hash = get_session_auth_hash
+        return user
@@ -34,17 +34,22 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.NPlusOneMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -125,6 +130,8 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
 #  подключаем движок filebased.EmailBackend
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
@@ -135,9 +142,54 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-#         'LOCATION': os.path.join(BASE_DIR, 'yatube_cache'),
-#     }
-# }
+THUMBNAIL_KVSTORE = 'posts.thumbnails.KVStore'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.tiered_cache.TieredCache',
+        'LOCATION': os.path.join(BASE_DIR, 'yatube_cache'),
+        'OPTIONS': {
+            'MAX_BYTES': 32 * 1024 * 1024,
+            'L1_TIMEOUT': 5,
+            'COMPRESS_MIN_SIZE': 4096,
+            # L2: страницы (по адресу и Vary), фрагменты, объекты из
+            # core.lookups и поколения. Файловый кэш пересчитывает файлы
+            # каталога при каждой записи, так что предел ограничивает и
+            # цену записи; при переполнении удаляется десятая часть.
+            'MAX_ENTRIES': 20000,
+            'CULL_FREQUENCY': 10,
+        },
+    }
+}
+
+# Сколько секунд после устаревания страницы отдаётся старая копия,
+# пока её пересчитывает один из процессов.
+PAGE_CACHE_GRACE = 60
+CACHE_MIDDLEWARE_SECONDS = 600
+
+# Адреса, которым отдаётся /metrics/.
+METRICS_IPS = ['127.0.0.1', '::1']
+
+# Профилирование запросов: доля случайных запросов и заголовок, которым
+# сотрудник включает снимок для своего запроса. Хранятся последние
+# PROFILE_KEEP снимков.
+PROFILE_SAMPLE_RATE = 0
+PROFILE_HEADER = 'X-Profile'
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_KEEP = 50
+
+# Поиск N+1: 'off', 'log' (доля NPLUSONE_SAMPLE_RATE запросов) или 'raise'.
+# Тестовый раннер включает 'raise'. NPLUSONE_VIEWS задаёт режим для имён
+# view (допускаются шаблоны вида 'admin:*'). Срабатывает, когда запрос
+# одной формы повторился NPLUSONE_THRESHOLD раз.
+NPLUSONE_MODE = 'log'
+NPLUSONE_SAMPLE_RATE = 0.01
+NPLUSONE_THRESHOLD = 3
+NPLUSONE_VIEWS = {
+    'admin:*': 'off',
+}
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Команда benchmark: бюджеты маршрутов и куда писать отчёт.
+BENCHMARK_BUDGETS = os.path.join(BASE_DIR, 'benchmarks', 'budgets.json')
+BENCHMARK_REPORT = os.path.join(BASE_DIR, 'benchmarks', 'report.json')